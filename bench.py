@@ -0,0 +1,407 @@
+"""Offline benchmarks for the royal court bot.
+
+Drives the real command callbacks and database helpers from bot.py against
+fake Discord objects, so numbers can be taken without a gateway or a token.
+Every Discord API call sleeps for a simulated latency instead.
+
+    python bench.py                                  # 1k, 10k and 100k row logs
+    python bench.py --sizes 1000,10000000 --latency 0.08 --jitter 0.02
+    python bench.py --iterations 500 --concurrency 20 --json baseline.json
+
+Each scenario reports throughput and p50/p99 latency; --json writes the same
+figures to a file so two runs can be compared.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import itertools
+from datetime import timedelta
+
+import discord
+from discord.ext import commands
+
+bot = None  # bot.py, imported by main() once its environment is in place
+
+GUILD_ID = 1_000_000_000_000_001
+OWNER_ID = 1_000_000_000_000_002
+MOD_ID = 1_000_000_000_000_003
+BOT_ID = 1_000_000_000_000_004
+USER_BASE = 2_000_000_000_000_000
+USER_POOL = 50_000
+ACTIONS = ("banish", "castout", "pillory", "stocks", "pardon", "purge")
+WORDS = "spam raid scam nitro free link insult flood alt evade slur toxic caps emoji".split()
+
+# ---------- FAKE DISCORD ----------
+class FakeAPI:
+    """Stand-in for the REST layer: every call costs a gaussian-jittered sleep"""
+
+    def __init__(self, latency, jitter):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+
+    async def call(self):
+        self.calls += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+class FakeRole:
+    def __init__(self, position):
+        self.position = position
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+    def __le__(self, other):
+        return self.position <= other.position
+
+    def __gt__(self, other):
+        return self.position > other.position
+
+    def __ge__(self, other):
+        return self.position >= other.position
+
+class FakeAsset:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+    key = "0"
+
+class FakeMember:
+    def __init__(self, api, guild, user_id, name, position=1, bot_account=False):
+        self.api = api
+        self.guild = guild
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self.bot = bot_account
+        self.top_role = FakeRole(position)
+        self.avatar = None
+        self.display_avatar = FakeAsset()
+        self.created_at = bot.utcnow() - timedelta(days=365)
+        self.guild_permissions = discord.Permissions.all()
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.name
+
+    def is_timed_out(self):
+        return False
+
+    async def ban(self, **kwargs):
+        await self.api.call()
+
+    async def kick(self, **kwargs):
+        await self.api.call()
+
+    async def timeout(self, until, **kwargs):
+        await self.api.call()
+
+class FakeMessage:
+    def __init__(self, api, channel, author, content="", message_id=0):
+        self.api = api
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.id = message_id
+        self.attachments = []
+        self.created_at = bot.utcnow()
+
+    async def delete(self, **kwargs):
+        await self.api.call()
+
+    async def edit(self, **kwargs):
+        await self.api.call()
+        return self
+
+class FakeChannel:
+    def __init__(self, api, guild, channel_id, name):
+        self.api = api
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.mention = f"<#{channel_id}>"
+        self.sent = 0
+        self._ids = itertools.count(10**12)
+
+    def permissions_for(self, member):
+        return discord.Permissions.all()
+
+    async def send(self, content=None, **kwargs):
+        await self.api.call()
+        self.sent += 1
+        return FakeMessage(self.api, self, self.guild.me, content or "", message_id=next(self._ids))
+
+    async def purge(self, limit=100, **kwargs):
+        await self.api.call()
+        return [None] * limit
+
+    async def delete_messages(self, messages):
+        await self.api.call()
+
+    async def history(self, limit=100, before=None, after=None, oldest_first=False):
+        """Synthetic channel history below `before`, newest first; one fetch per 100 messages like the real paginator"""
+        authors = list(self.guild.members.values())
+        newest = before.id - 1 if before is not None else 10**12 - 1
+        for index in range(limit):
+            if index % 100 == 0:
+                await self.api.call()
+            yield FakeMessage(self.api, self, authors[index % len(authors)],
+                              " ".join(random.choices(WORDS, k=4)), message_id=newest - index)
+
+class FakeGuild:
+    def __init__(self, api):
+        self.api = api
+        self.id = GUILD_ID
+        self.name = "Benchmark Realm"
+        self.owner_id = OWNER_ID
+        self.icon = None
+        self.members = {}
+        self.me = self._add(BOT_ID, "Royal Herald", position=100, bot_account=True)
+        self._add(OWNER_ID, "The Sovereign", position=200)
+        self.moderator = self._add(MOD_ID, "Lord Chancellor", position=50)
+        for offset in range(1000):
+            self._add(USER_BASE + offset, f"Peasant {offset}")
+        self.hall = FakeChannel(api, self, 3_000_000_000_000_001, "great-hall")
+        self.decree_hall = FakeChannel(api, self, 3_000_000_000_000_002, "proclamations")
+        self.system_channel = self.hall
+        self.channels = {self.hall.id: self.hall, self.decree_hall.id: self.decree_hall}
+
+    def _add(self, user_id, name, **kwargs):
+        member = FakeMember(self.api, self, user_id, name, **kwargs)
+        self.members[user_id] = member
+        return member
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def query_members(self, user_ids=None, limit=100, cache=False, **kwargs):
+        await self.api.call()
+        return [FakeMember(self.api, self, user_id, f"Wanderer {user_id % USER_POOL}") for user_id in user_ids or ()]
+
+    async def ban(self, user, **kwargs):
+        await self.api.call()
+
+    async def kick(self, user, **kwargs):
+        await self.api.call()
+
+class FakeContext:
+    def __init__(self, guild, command_name):
+        self.guild = guild
+        self.author = guild.moderator
+        self.channel = guild.hall
+        self.message = FakeMessage(guild.api, guild.hall, guild.moderator, f"{bot.PREFIX}{command_name}")
+        self.command = bot.bot.get_command(command_name)
+        self.bot = bot.bot
+        self.prefix = bot.PREFIX
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+# ---------- SEEDING ----------
+def seed_rows(count, seed=7):
+    """Yield punishment rows spread across five guilds and a year of history"""
+    rnd = random.Random(seed)
+    now_ms = bot.to_epoch_ms(bot.utcnow())
+    year_ms = 365 * 86_400_000
+    guilds = (GUILD_ID, GUILD_ID + 1, GUILD_ID + 2, GUILD_ID + 3, GUILD_ID + 4)
+    for _ in range(count):
+        user_id = USER_BASE + int(rnd.paretovariate(1.2)) % USER_POOL
+        named = rnd.random() < 0.9
+        yield (rnd.choice(guilds), user_id, MOD_ID, rnd.choice(ACTIONS), " ".join(rnd.choices(WORDS, k=5)),
+               now_ms - rnd.randrange(year_ms), f"Peasant {user_id - USER_BASE}" if named else None,
+               "Lord Chancellor" if named else None)
+
+async def seed_database(count, batch=50_000):
+    rows = seed_rows(count)
+    written = 0
+    started = time.perf_counter()
+    while written < count:
+        chunk = [next(rows) for _ in range(min(batch, count - written))]
+        await bot.db.run(bot.write_punishments, chunk)
+        written += len(chunk)
+        if count >= 1_000_000:
+            print(f"  seeded {written:,}/{count:,} rows", file=sys.stderr)
+    return time.perf_counter() - started
+
+# ---------- SCENARIOS ----------
+def purge_filters(**values):
+    """Build a PurgeFilters as the flag converter would, without parsing text"""
+    filters = bot.PurgeFilters.__new__(bot.PurgeFilters)
+    for name, flag in bot.PurgeFilters.get_flags().items():
+        setattr(filters, name, values.get(name, flag.default))
+    return filters
+
+def scenarios(guild):
+    """name -> zero-argument coroutine factory; each call is one timed operation"""
+    members = [m for m in guild.members.values() if m.id >= USER_BASE]
+    victims = iter(range(10**6))
+
+    def ctx(name):
+        return FakeContext(guild, name)
+
+    def fresh_member():
+        return FakeMember(guild.api, guild, USER_BASE + USER_POOL + next(victims), "Knave")
+
+    def command(name):
+        return bot.bot.get_command(name).callback
+
+    error = commands.BadArgument('Member "nobody" not found.')
+    search_terms = iter(random.Random(3).choices(WORDS, k=10**6))
+    return {
+        "purge": lambda: command("purge")(ctx("purge"), 50),
+        "purge filtered": lambda: command("purge")(ctx("purge"), 500, filters=purge_filters(match="spam|scam")),
+        "banish": lambda: command("banish")(ctx("banish"), fresh_member(), None, reason="Benchmark treason"),
+        "pillory": lambda: command("pillory")(ctx("pillory"), random.choice(members), 30, reason="Benchmark mischief"),
+        "chronicle": lambda: command("chronicle")(ctx("chronicle"), random.choice(members[:50])),
+        "courtlog": lambda: command("courtlog")(ctx("courtlog"), 10),
+        "decree": lambda: command("decree")(ctx("decree"), guild.decree_hall, message="The feast begins at sundown!"),
+        "on_command_error": lambda: bot.on_command_error(ctx("banish"), error),
+        "db count_history": lambda: bot.count_history(GUILD_ID, random.choice(members[:50]).id, 0, bot.MAX_EPOCH_MS),
+        "db fetch_history": lambda: bot.fetch_history(GUILD_ID, random.choice(members[:50]).id),
+        "db fetch_court_log": lambda: bot.fetch_court_log(GUILD_ID, 25),
+        "db search_punishments": lambda: bot.search_punishments(GUILD_ID, next(search_terms), limit=6),
+        "db log_action": lambda: bot.log_action(GUILD_ID, random.choice(members), guild.moderator, "stocks", "Benchmark"),
+    }
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def measure(factory, iterations, concurrency):
+    """Run `iterations` operations with up to `concurrency` in flight; returns latency figures"""
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await factory()
+            timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(iterations)))
+    wall = time.perf_counter() - started
+    timings.sort()
+    return {
+        "n": iterations,
+        "ops_per_s": round(iterations / wall, 1),
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 3),
+    }
+
+async def measure_export(batch_size=1000):
+    """Stream one guild's whole log through iter_punishments; reports rows per second"""
+    started = time.perf_counter()
+    rows = 0
+    async for batch in bot.iter_punishments(GUILD_ID, batch_size=batch_size):
+        rows += len(batch)
+    wall = time.perf_counter() - started
+    return {"n": rows, "ops_per_s": round(rows / wall, 1) if wall else 0.0, "p50_ms": None, "p99_ms": None}
+
+async def drain_herald(timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while bot.herald.depth and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+def use_database(path):
+    """Point bot.py and the services holding its Database at a fresh scratch file"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    bot.db = bot.Database(path)
+    for service in (bot.journal, bot.guild_config, bot.sentences, bot.archive):
+        service.db = bot.db
+    # Block ids restart with each file, so cached blocks from the previous size would be served for new ones
+    bot.archive._cache.clear()
+    bot.archive.archived = 0
+
+async def run_size(size, args, selected):
+    use_database(os.path.join(args.workdir, f"bench_{size}.db"))
+    await bot.db.open()
+    results = {}
+    try:
+        seed_seconds = await seed_database(size)
+        print(f"\n📜  {size:,} rows (seeded in {seed_seconds:.1f}s)")
+        bot.journal.start()
+        bot.herald.start()
+        api = FakeAPI(args.latency, args.jitter)
+        guild = FakeGuild(api)
+        bot.bot.get_guild = lambda guild_id: guild if guild_id == GUILD_ID else None
+        for name, factory in scenarios(guild).items():
+            if selected and name not in selected:
+                continue
+            await measure(factory, min(args.warmup, args.iterations), args.concurrency)
+            results[name] = await measure(factory, args.iterations, args.concurrency)
+            await drain_herald()
+            report(name, results[name])
+        if not selected or "db iter_punishments" in selected:
+            results["db iter_punishments"] = await measure_export()
+            report("db iter_punishments", results["db iter_punishments"])
+    finally:
+        await bot.herald.stop()
+        await bot.journal.stop()
+        await bot.db.close()
+    return results
+
+def report(name, figures):
+    p50 = "-" if figures["p50_ms"] is None else f"{figures['p50_ms']:.2f}"
+    p99 = "-" if figures["p99_ms"] is None else f"{figures['p99_ms']:.2f}"
+    print(f"  {name:<24} {figures['n']:>9,}  {figures['ops_per_s']:>12,.1f}/s  p50 {p50:>9} ms  p99 {p99:>9} ms")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark bot.py commands and database helpers offline.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated log sizes to seed (rows)")
+    parser.add_argument("--iterations", type=int, default=200, help="timed operations per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed operations before each scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="operations in flight at once")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean simulated Discord API latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="standard deviation of the simulated latency")
+    parser.add_argument("--only", default="", help="comma-separated scenario names to run")
+    parser.add_argument("--workdir", default=None, help="directory for the scratch databases (default: a temp dir)")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write results to this file")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for target selection and latency")
+    return parser.parse_args()
+
+async def run(args):
+    sizes = [int(size.replace("_", "")) for size in args.sizes.split(",") if size.strip()]
+    selected = {name.strip() for name in args.only.split(",") if name.strip()}
+    print(f"⚖️  latency {args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms, "
+          f"{args.iterations} iterations, concurrency {args.concurrency}")
+    return {str(size): await run_size(size, args, selected) for size in sizes}
+
+def main():
+    global bot
+    args = parse_args()
+    random.seed(args.seed)
+    args.workdir = args.workdir or tempfile.mkdtemp(prefix="royal_bench_")
+    os.makedirs(args.workdir, exist_ok=True)
+    # bot.py reads its configuration at import; keep it away from the real token, database and listeners
+    os.environ["DISCORD_TOKEN"] = os.environ.get("DISCORD_TOKEN") or "offline-benchmark"
+    os.environ["DB_NAME"] = os.path.join(args.workdir, "bench.db")
+    os.environ["AUTOMOD"] = "off"
+    os.environ["RAID_ACTION"] = "off"
+    import bot as royal_court
+    bot = royal_court
+    bot.logger.setLevel("WARNING")
+
+    results = asyncio.run(run(args))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"latency": args.latency, "jitter": args.jitter, "iterations": args.iterations,
+                       "concurrency": args.concurrency, "results": results}, f, indent=2)
+        print(f"\n✅ Results written to {args.json_path}")
+
+if __name__ == "__main__":
+    main()
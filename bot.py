@@ -1,7 +1,27 @@
 # royal_court_render_fixed.py - Fixed for Python 3.13 compatibility
 import os
+import re
+import io
+import csv
+import json
+import hmac
+import zlib
+import bisect
+import heapq
+import itertools
+import math
+import sys
+import signal
 import random
 import sqlite3
+import asyncio
+import time
+import threading
+import traceback
+from collections import Counter, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import yarl
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
@@ -17,7 +37,49 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 PREFIX = os.getenv("PREFIX", "!")
-DB_NAME = "royal_court.db"
+DB_NAME = os.getenv("DB_NAME", "royal_court.db")
+JOURNAL_BATCH_SIZE = int(os.getenv("JOURNAL_BATCH_SIZE", "50"))
+JOURNAL_FLUSH_INTERVAL = float(os.getenv("JOURNAL_FLUSH_INTERVAL", "1.0"))
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+# Point the client at a local Discord stand-in (see mock_discord.py) instead of discord.com
+DISCORD_API_BASE = os.getenv("DISCORD_API_BASE")
+DISCORD_GATEWAY = os.getenv("DISCORD_GATEWAY")
+# Sharding is opt-in: SHARD_COUNT is a number or "auto"; CLUSTER_COUNT > 1 spreads shards over worker processes
+SHARD_COUNT = os.getenv("SHARD_COUNT")
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()] or None
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT", "1"))
+CLUSTER_ID = int(os.environ["CLUSTER_ID"]) if os.getenv("CLUSTER_ID") else None
+# "full" keeps every member of every guild in RAM; "lazy" skips chunking and keeps only recently seen members
+MEMBER_CACHE = os.getenv("MEMBER_CACHE", "full").lower()
+MEMBER_LRU_SIZE = int(os.getenv("MEMBER_LRU_SIZE", "5000"))
+MASS_ACTION_CONCURRENCY = int(os.getenv("MASS_ACTION_CONCURRENCY", "5"))
+# Judgments older than RETENTION_DAYS move to compressed monthly segments in ARCHIVE_DIR; 0 keeps everything hot
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "0"))
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "21600"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "royal_archive")
+# Databases created before incremental auto-vacuum only shrink after one full VACUUM; it blocks the file, so it is opt-in at startup
+VACUUM_ON_START = os.getenv("VACUUM_ON_START", "").lower() in ("1", "on", "true", "yes")
+# Automod trips on more than AUTOMOD_MAX_* events per user and channel within AUTOMOD_WINDOW seconds
+AUTOMOD = os.getenv("AUTOMOD", "on").lower() not in ("0", "off", "false", "no")
+AUTOMOD_WINDOW = float(os.getenv("AUTOMOD_WINDOW", "5"))
+AUTOMOD_MAX_MESSAGES = int(os.getenv("AUTOMOD_MAX_MESSAGES", "8"))
+AUTOMOD_MAX_DUPLICATES = int(os.getenv("AUTOMOD_MAX_DUPLICATES", "4"))
+AUTOMOD_MAX_MENTIONS = int(os.getenv("AUTOMOD_MAX_MENTIONS", "10"))
+AUTOMOD_STOCKS_MINUTES = int(os.getenv("AUTOMOD_STOCKS_MINUTES", "10"))
+# RAID_JOINS joins within RAID_WINDOW seconds is a raid; RAID_ACTION is "off" (the default), "lockdown", "castout" or "banish"
+RAID_JOINS = int(os.getenv("RAID_JOINS", "10"))
+RAID_WINDOW = float(os.getenv("RAID_WINDOW", "10"))
+RAID_ACTION = os.getenv("RAID_ACTION", "off").lower()
+RAID_CLUSTER = int(os.getenv("RAID_CLUSTER", "3"))
+RAID_YOUNG_DAYS = int(os.getenv("RAID_YOUNG_DAYS", "7"))
+# Each judgment adds its OFFENSE_WEIGHTS entry to a soul's offense score, which halves every OFFENSE_HALF_LIFE_DAYS
+OFFENSE_WEIGHTS = {action.strip(): float(weight) for action, weight in (pair.split("=") for pair in os.getenv("OFFENSE_WEIGHTS", "banish=10,castout=5,pillory=3,stocks=2").split(",") if pair.strip())}
+OFFENSE_HALF_LIFE_DAYS = float(os.getenv("OFFENSE_HALF_LIFE_DAYS", "30"))
+OFFENSE_TROUBLESOME = float(os.getenv("OFFENSE_TROUBLESOME", "8"))
+# "score=minutes" steps: the sentence !stocks passes without explicit minutes, and the least automod will pass
+STOCKS_LADDER = sorted((float(score), int(minutes)) for score, minutes in (pair.split("=") for pair in os.getenv("STOCKS_LADDER", "0=10,4=60,8=360,15=1440").split(",") if pair.strip()))
 
 # Validate required environment variables
 if not TOKEN:
@@ -56,6 +118,8 @@ ROYAL_SIGNATURES = [
     "Signed with royal blood", "Marked with the King's signet", "Carried by royal messenger", "Announced with trumpet blast",
 ]
 
+ACTION_ICONS = {"banish": "🏴", "castout": "🚪", "pillory": "🪓", "stocks": "🔒", "pardon": "🕊️", "summon": "📯", "purge": "🧹", "decree": "📜"}
+
 def get_medieval_prefix():
     return random.choice(MEDIEVAL_PREFIXES)
 
@@ -73,107 +137,1380 @@ def medieval_response(message, success=True):
     return medieval_embed(description=full_message, color_name=color)
 
 # ---------- BOT ----------
+if DISCORD_API_BASE:
+    discord.http.Route.BASE = DISCORD_API_BASE.rstrip("/")
+if DISCORD_GATEWAY:
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(DISCORD_GATEWAY)
 intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
-bot = commands.Bot(command_prefix=PREFIX, intents=intents, help_command=None, case_insensitive=True)
+bot_options = dict(command_prefix=PREFIX, intents=intents, help_command=None, case_insensitive=True)
+if MEMBER_CACHE == "lazy":
+    bot_options.update(chunk_guilds_at_startup=False, member_cache_flags=discord.MemberCacheFlags.none())
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(
+        shard_count=None if SHARD_COUNT == "auto" else int(SHARD_COUNT), shard_ids=SHARD_IDS, **bot_options)
+else:
+    bot = commands.Bot(**bot_options)
 
 # Add start_time for status tracking
 bot.start_time = utcnow()
 
+# ---------- MEMBER CACHE ----------
+MISSING_MEMBER = object()
+
+class MemberLRU:
+    """Bounded cache of recently seen members keyed by (guild_id, user_id).
+
+    Departed users are remembered as MISSING_MEMBER so repeated lookups for
+    them do not turn into repeated API fetches.
+    """
+
+    def __init__(self, maxsize=5000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, guild_id, user_id):
+        key = (guild_id, user_id)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, guild_id, user_id, entry):
+        key = (guild_id, user_id)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def remember(self, member):
+        self.put(member.guild.id, member.id, member)
+
+    def forget(self, guild_id, user_id):
+        self._entries.pop((guild_id, user_id), None)
+
+recent_members = MemberLRU(MEMBER_LRU_SIZE)
+
+class UserNameCache:
+    """Process-wide user id → display name map, bounded like MemberLRU.
+
+    Names are captured as judgments are written, so rendering the court log
+    needs no lookups; ids the cache has never seen are resolved in one batch.
+    """
+
+    def __init__(self, maxsize=20000):
+        self.maxsize = maxsize
+        self._names = OrderedDict()
+
+    def get(self, user_id):
+        name = self._names.get(user_id)
+        if name is not None:
+            self._names.move_to_end(user_id)
+        return name
+
+    def put(self, user_id, name):
+        if not name:
+            return
+        self._names[user_id] = name
+        self._names.move_to_end(user_id)
+        if len(self._names) > self.maxsize:
+            self._names.popitem(last=False)
+
+    async def resolve(self, guild, user_ids):
+        """Return names for user_ids, asking the gateway once (≤100 ids per request) for unknown ones"""
+        names, unknown = {}, []
+        for user_id in user_ids:
+            member = guild.get_member(user_id)
+            name = member.display_name if member else self.get(user_id)
+            if name:
+                names[user_id] = name
+            else:
+                unknown.append(user_id)
+        for member in (await fetch_members_bulk(guild, unknown)).values():
+            self.put(member.id, member.display_name)
+            names[member.id] = member.display_name
+        return names
+
+user_names = UserNameCache()
+
+async def fetch_members_bulk(guild, user_ids):
+    """Resolve many ids to members: cache and LRU first, then one gateway query per 100 unknown ids"""
+    found, unknown = {}, []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member is None:
+            entry = recent_members.get(guild.id, user_id)
+            member = None if entry is MISSING_MEMBER else entry
+        if member is not None:
+            found[user_id] = member
+        elif entry is None:
+            unknown.append(user_id)
+    for start in range(0, len(unknown), 100):
+        chunk = unknown[start:start + 100]
+        try:
+            members = await guild.query_members(user_ids=chunk, limit=100, cache=False)
+        except (asyncio.TimeoutError, discord.ClientException, discord.HTTPException) as e:
+            logger.warning(f"⚠️ Could not resolve {len(unknown) - start} members in {guild.id}: {e}")
+            break
+        for member in members:
+            recent_members.remember(member)
+            found[member.id] = member
+    return found
+
+class CachedMember(commands.MemberConverter):
+    """Member converter that consults the recent-member LRU before any gateway or HTTP lookup"""
+
+    async def convert(self, ctx, argument):
+        match = self._get_id_match(argument) or re.match(r'<@!?([0-9]{15,20})>$', argument)
+        if match and ctx.guild:
+            entry = recent_members.get(ctx.guild.id, int(match.group(1)))
+            if entry is not None and entry is not MISSING_MEMBER:
+                return entry
+        member = await super().convert(ctx, argument)
+        recent_members.remember(member)
+        return member
+
+# ---------- METRICS ----------
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DISCORD_API_CALLS = ("ban", "kick", "timeout", "purge")
+DATABASE_OPS = ("run", "fetchone", "fetchall")
+
+class Histogram:
+    """Fixed-bucket latency histogram; observing only bumps pre-allocated counters"""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+class Metrics:
+    """Process-wide counters and histograms served at /metrics in Prometheus text format"""
+
+    def __init__(self):
+        self.commands = {}
+        self.errors = {}
+        self.discord_api = {call: Histogram() for call in DISCORD_API_CALLS}
+        self.database = {op: Histogram() for op in DATABASE_OPS}
+
+    def prepare_commands(self, names):
+        """Allocate a counter and histogram per command up front so invocations never grow the dict"""
+        for name in names:
+            self.commands.setdefault(name, Histogram())
+
+    def command(self, name):
+        histogram = self.commands.get(name)
+        if histogram is None:
+            histogram = self.commands[name] = Histogram()
+        return histogram
+
+    def record_error(self, error):
+        name = type(error).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def render(self, extra_gauges=()):
+        lines = [
+            "# HELP royal_command_invocations_total Commands invoked, by command.",
+            "# TYPE royal_command_invocations_total counter",
+        ]
+        lines += [f'royal_command_invocations_total{{command="{name}"}} {h.count}' for name, h in self.commands.items()]
+        lines += [
+            "# HELP royal_command_errors_total Command errors, by exception type.",
+            "# TYPE royal_command_errors_total counter",
+        ]
+        lines += [f'royal_command_errors_total{{error="{name}"}} {count}' for name, count in self.errors.items()]
+        lines += [
+            "# HELP royal_command_duration_seconds Whole command handler latency.",
+            "# TYPE royal_command_duration_seconds histogram",
+        ]
+        for name, histogram in self.commands.items():
+            lines += histogram.render("royal_command_duration_seconds", f'command="{name}"')
+        lines += [
+            "# HELP royal_discord_api_duration_seconds Discord API call latency.",
+            "# TYPE royal_discord_api_duration_seconds histogram",
+        ]
+        for call, histogram in self.discord_api.items():
+            lines += histogram.render("royal_discord_api_duration_seconds", f'call="{call}"')
+        lines += [
+            "# HELP royal_db_duration_seconds Database call latency including worker queueing.",
+            "# TYPE royal_db_duration_seconds histogram",
+        ]
+        for op, histogram in self.database.items():
+            lines += histogram.render("royal_db_duration_seconds", f'op="{op}"')
+        for name, help_text, value in extra_gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+class LoopWatchdog:
+    """Measures event loop lag continuously and snapshots whatever holds the loop too long.
+
+    A probe task records how late each short sleep wakes up. A daemon thread
+    watches the probe's heartbeat; when it stops ticking for longer than the
+    threshold the thread logs the running task and the loop thread's stack.
+    """
+
+    def __init__(self, interval=0.1, threshold=0.25, window=600):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = deque(maxlen=window)
+        self.stalls = 0
+        self._last_tick = time.monotonic()
+        self._loop = None
+        self._loop_thread = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._probe())
+        self._thread = threading.Thread(target=self._watch, name="royal-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _probe(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.samples.append(max(0.0, now - started - self.interval))
+            self._last_tick = now
+
+    def _watch(self):
+        reported = None
+        while not self._stopped.wait(self.interval):
+            last_tick = self._last_tick
+            stalled = time.monotonic() - last_tick - self.interval
+            if stalled < self.threshold or reported == last_tick:
+                continue
+            reported = last_tick
+            self.stalls += 1
+            task = asyncio.current_task(self._loop)
+            culprit = f"{task.get_name()} ({task.get_coro().__qualname__})" if task else "a bare callback"
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<no stack>"
+            logger.warning(f"⏳ Event loop blocked for over {stalled * 1000:.0f} ms by {culprit}\n{stack}")
+
+    def percentiles(self):
+        """Rolling lag percentiles in milliseconds"""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "stalls": self.stalls}
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+        return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 2), "stalls": self.stalls}
+
+watchdog = LoopWatchdog(threshold=LOOP_LAG_THRESHOLD)
+
+# ---------- HERALD ----------
+PRIORITY_JUDGMENT = 0  # replies about moderation actions and errors the moderator must see
+PRIORITY_NOTICE = 1    # short-lived confirmations (delete_after)
+PRIORITY_FLAVOUR = 2   # public shaming and other colour
+
+class Outbound:
+    __slots__ = ("priority", "seq", "destination", "kwargs", "future", "enqueued", "key", "dropped")
+
+    def __init__(self, priority, seq, destination, kwargs, future, key):
+        self.priority = priority
+        self.seq = seq
+        self.destination = destination
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.key = key
+        self.dropped = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class Herald:
+    """Priority queue for outbound messages so cosmetic sends never crowd out moderation"""
+
+    MAX_AGE = {PRIORITY_NOTICE: 15.0, PRIORITY_FLAVOUR: 30.0}
+
+    def __init__(self, workers=3, max_depth=200, saturation_latency=1.0):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.saturation_latency = saturation_latency
+        self._heap = []
+        self._keys = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self._saturated_until = 0.0
+        self.depth = 0
+        self.sent = 0
+        self.shed = 0
+        self.coalesced = 0
+
+    def post(self, destination, priority=PRIORITY_JUDGMENT, coalesce=None, **kwargs):
+        """Queue a send without blocking; the returned future resolves to the Message, or None if shed"""
+        future = asyncio.get_running_loop().create_future()
+        key = None
+        if coalesce is not None:
+            key = (getattr(destination, "channel", destination).id, coalesce)
+            previous = self._keys.pop(key, None)
+            if previous is not None:
+                self._drop(previous)
+                self.shed -= 1
+                self.coalesced += 1
+        item = Outbound(priority, next(self._seq), destination, kwargs, future, key)
+        heapq.heappush(self._heap, item)
+        if key is not None:
+            self._keys[key] = item
+        self.depth += 1
+        if self.depth > self.max_depth:
+            self._shed_lowest()
+        self._wakeup.set()
+        return future
+
+    def _drop(self, item):
+        item.dropped = True
+        self.depth -= 1
+        self.shed += 1
+        if item.key is not None and self._keys.get(item.key) is item:
+            del self._keys[item.key]
+        if not item.future.done():
+            item.future.set_result(None)
+
+    def _shed_lowest(self):
+        victims = [item for item in self._heap if not item.dropped and item.priority != PRIORITY_JUDGMENT]
+        if victims:
+            self._drop(max(victims))
+
+    def _should_shed(self, item, now):
+        max_age = self.MAX_AGE.get(item.priority)
+        if max_age is not None and now - item.enqueued > max_age:
+            return True
+        return item.priority == PRIORITY_FLAVOUR and now < self._saturated_until
+
+    async def _deliver(self):
+        while True:
+            while not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            item = heapq.heappop(self._heap)
+            if item.dropped:
+                continue
+            now = time.monotonic()
+            if self._should_shed(item, now):
+                self._drop(item)
+                continue
+            item.dropped = True  # taken; a later post with the same key must not touch it
+            self.depth -= 1
+            if item.key is not None and self._keys.get(item.key) is item:
+                del self._keys[item.key]
+            message = None
+            try:
+                message = await item.destination.send(**item.kwargs)
+                self.sent += 1
+            except discord.HTTPException as e:
+                logger.warning(f"⚠️ Herald could not deliver a message: {e}")
+            except Exception as e:
+                # Connection resets and timeouts escape discord.py untranslated
+                logger.warning(f"⚠️ Herald could not deliver a message: {e!r}")
+            finally:
+                if not item.future.done():
+                    item.future.set_result(message)
+            if time.monotonic() - now > self.saturation_latency:
+                self._saturated_until = time.monotonic() + 5.0
+
+    def _spawn(self):
+        task = asyncio.create_task(self._deliver())
+        task.add_done_callback(self._revive)
+        return task
+
+    def _revive(self, task):
+        """Replace a worker that died unexpectedly so the queue is never left unserved"""
+        if task.cancelled() or task not in self._tasks:
+            return
+        logger.error(f"❌ Herald worker died: {task.exception()!r}; raising another")
+        self._tasks[self._tasks.index(task)] = self._spawn()
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [self._spawn() for _ in range(self.workers)]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for item in self._heap:
+            if not item.dropped:
+                self._drop(item)
+        self._heap = []
+
+    def stats(self):
+        return {"depth": self.depth, "sent": self.sent, "shed": self.shed, "coalesced": self.coalesced}
+
+herald = Herald()
+
 # ---------- DB ----------
-def init_db():
-    """Initialize database with proper error handling for Render"""
-    try:
-        with sqlite3.connect(DB_NAME) as db:
-            db.execute("""
-            CREATE TABLE IF NOT EXISTS punishments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                moderator_id INTEGER,
-                action TEXT,
-                reason TEXT,
-                timestamp TEXT
-            )""")
-            db.execute("""
-            CREATE TABLE IF NOT EXISTS guild_config (
-                guild_id INTEGER PRIMARY KEY,
-                pillory_channel INTEGER,
-                decree_channel INTEGER
-            )""")
-            db.commit()
-            logger.info("✅ Database initialized successfully")
-    except sqlite3.Error as e:
-        logger.error(f"❌ Database initialization failed: {e}")
-        raise
+class Database:
+    """Single long-lived SQLite connection serviced by a dedicated worker thread.
+
+    Every query runs on the worker so the event loop (gateway heartbeat, web
+    server, other commands) never waits on disk I/O. The connection keeps its
+    prepared statement cache for the lifetime of the bot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="royal-db")
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        # Must precede the WAL switch, and only takes effect on a brand-new file; older ones need rebuild_for_reclaim()
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.create_function("decay", 2, decay_score, deterministic=True)
+        return conn
+
+    def _transact(self, fn, *args):
+        with self._conn:
+            return fn(self._conn, *args)
+
+    async def open(self):
+        """Open the connection, apply PRAGMAs and prepare the schema once at startup"""
+        if self._conn is None:
+            self._conn = await self._call(self._connect)
+            await self.run(init_db)
+
+    async def close(self):
+        """Close the connection and stop the worker thread"""
+        if self._conn is not None:
+            await self._call(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    async def run(self, fn, *args):
+        """Run fn(conn, *args) on the worker thread inside a single transaction"""
+        with metrics.database["run"].time():
+            return await self._call(self._transact, fn, *args)
+
+    async def execute(self, sql, params=()):
+        """Execute a write statement and commit it"""
+        return await self.run(lambda conn: conn.execute(sql, params).rowcount)
+
+    async def executemany(self, sql, seq_of_params):
+        """Execute a write statement for many parameter sets in one transaction"""
+        return await self.run(lambda conn: conn.executemany(sql, seq_of_params).rowcount)
+
+    async def fetchone(self, sql, params=()):
+        with metrics.database["fetchone"].time():
+            return await self._call(lambda: self._conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql, params=()):
+        with metrics.database["fetchall"].time():
+            return await self._call(lambda: self._conn.execute(sql, params).fetchall())
+
+    async def reclaim(self):
+        """Return free pages to the filesystem; None when the file is not in incremental mode and keeps them for reuse"""
+        def reclaim():
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+                return None
+            freed = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            # executescript steps the pragma to completion; a cursor stops after the first freed page
+            self._conn.executescript("PRAGMA incremental_vacuum")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            return freed
+        return await self._call(reclaim)
+
+    async def rebuild_for_reclaim(self):
+        """Switch a pre-existing file to incremental auto-vacuum with its one full VACUUM.
+
+        The rebuild rewrites the whole file while holding it exclusively, so it
+        only runs at startup when VACUUM_ON_START is set, before any cluster or
+        command can touch the database.
+        """
+        def rebuild():
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("VACUUM")
+            return True
+        started = time.perf_counter()
+        if await self._call(rebuild):
+            logger.info(f"✅ Rebuilt {self.path} for incremental auto-vacuum in {time.perf_counter() - started:.1f}s")
+
+db = Database(DB_NAME)
+
+# ---------- MIGRATIONS ----------
+def _has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+def _migration_base_tables(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS punishments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        moderator_id INTEGER,
+        action TEXT,
+        reason TEXT,
+        timestamp TEXT
+    )""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS guild_config (
+        guild_id INTEGER PRIMARY KEY,
+        pillory_channel INTEGER,
+        decree_channel INTEGER
+    )""")
+
+def _migration_guild_scope(conn):
+    if not _has_column(conn, "punishments", "guild_id"):
+        conn.execute("ALTER TABLE punishments ADD COLUMN guild_id INTEGER")
+    # Older rows carry no guild; if the court only ever served one realm they belong to it
+    guilds = conn.execute("SELECT guild_id FROM guild_config").fetchall()
+    if len(guilds) == 1:
+        conn.execute("UPDATE punishments SET guild_id=? WHERE guild_id IS NULL", guilds[0])
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_punishments_guild_user_ts ON punishments (guild_id, user_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_punishments_guild_ts ON punishments (guild_id, timestamp)")
+
+def _migration_epoch_timestamps(conn):
+    # Rebuild the table so the ISO-8601 TEXT column becomes integer epoch milliseconds
+    conn.execute("""
+    CREATE TABLE punishments_v3 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER,
+        user_id INTEGER,
+        moderator_id INTEGER,
+        action TEXT,
+        reason TEXT,
+        ts INTEGER NOT NULL
+    )""")
+    conn.execute("""
+    INSERT INTO punishments_v3 (id, guild_id, user_id, moderator_id, action, reason, ts)
+    SELECT id, guild_id, user_id, moderator_id, action, reason,
+           COALESCE(CAST(ROUND((julianday(timestamp) - 2440587.5) * 86400000) AS INTEGER), 0)
+    FROM punishments""")
+    conn.execute("DROP TABLE punishments")
+    conn.execute("ALTER TABLE punishments_v3 RENAME TO punishments")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_punishments_guild_user_ts ON punishments (guild_id, user_id, ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_punishments_guild_ts ON punishments (guild_id, ts)")
+
+def _migration_time_index(conn):
+    # Lets realm-wide exports walk the log in time order without sorting
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_punishments_ts ON punishments (ts)")
+
+def _migration_name_snapshots(conn):
+    for column in ("user_name", "moderator_name"):
+        if not _has_column(conn, "punishments", column):
+            conn.execute(f"ALTER TABLE punishments ADD COLUMN {column} TEXT")
+
+def _migration_sentences(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sentences (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        due_ms INTEGER NOT NULL,
+        until_ms INTEGER NOT NULL,
+        reason TEXT
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sentences_due ON sentences (due_ms)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sentences_guild_user ON sentences (guild_id, user_id)")
+
+def _migration_reason_search(conn):
+    # Contentless: the text already lives in punishments, the index only needs
+    # reason tokens plus "g<guild> a<action>" scope tokens to filter inside the match
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS punishments_fts USING fts5(reason, scope, content='')")
+    # One execute per trigger: executescript would commit init_db's BEGIN IMMEDIATE mid-migration
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS punishments_fts_insert AFTER INSERT ON punishments BEGIN
+        INSERT INTO punishments_fts (rowid, reason, scope)
+        VALUES (new.id, new.reason, 'g' || new.guild_id || ' a' || new.action);
+    END""")
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS punishments_fts_delete AFTER DELETE ON punishments BEGIN
+        INSERT INTO punishments_fts (punishments_fts, rowid, reason, scope)
+        VALUES ('delete', old.id, old.reason, 'g' || old.guild_id || ' a' || old.action);
+    END""")
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS punishments_fts_update AFTER UPDATE OF guild_id, action, reason ON punishments BEGIN
+        INSERT INTO punishments_fts (punishments_fts, rowid, reason, scope)
+        VALUES ('delete', old.id, old.reason, 'g' || old.guild_id || ' a' || old.action);
+        INSERT INTO punishments_fts (rowid, reason, scope)
+        VALUES (new.id, new.reason, 'g' || new.guild_id || ' a' || new.action);
+    END""")
+    conn.execute("""
+    INSERT INTO punishments_fts (rowid, reason, scope)
+    SELECT id, reason, 'g' || guild_id || ' a' || action FROM punishments
+    """)
+
+def _migration_archive_index(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS archive_blocks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        segment TEXT NOT NULL,
+        byte_offset INTEGER NOT NULL,
+        byte_length INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        min_ts INTEGER NOT NULL,
+        max_ts INTEGER NOT NULL,
+        bloom BLOB NOT NULL
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_blocks_ts ON archive_blocks (max_ts, min_ts)")
+
+def _migration_rollups(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS punishment_rollups (
+        guild_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        moderator_id INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, day, action, moderator_id)
+    ) WITHOUT ROWID""")
+    # Rows already archived are not in the table any more; only the hot log can be counted here
+    fold_into_rollups(conn, "guild_id IS NOT NULL")
+
+def _migration_offense_scores(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS offense_scores (
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        score REAL NOT NULL,
+        updated_ms INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, user_id)
+    ) WITHOUT ROWID""")
+    score_offenses(conn, conn.execute(
+        "SELECT guild_id, user_id, action, ts FROM punishments WHERE guild_id IS NOT NULL ORDER BY ts").fetchall())
+
+# Each entry upgrades the schema by one PRAGMA user_version; append only, never reorder
+MIGRATIONS = [
+    _migration_base_tables,
+    _migration_guild_scope,
+    _migration_epoch_timestamps,
+    _migration_time_index,
+    _migration_name_snapshots,
+    _migration_sentences,
+    _migration_reason_search,
+    _migration_archive_index,
+    _migration_rollups,
+    _migration_offense_scores,
+]
+
+def init_db(conn):
+    """Bring the schema up to the latest version, one transaction per migration"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target in range(version + 1, len(MIGRATIONS) + 1):
+        # IMMEDIATE takes the write lock up front so concurrent cluster workers cannot race a migration
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= target:
+            conn.rollback()
+            continue
+        try:
+            MIGRATIONS[target - 1](conn)
+            conn.execute(f"PRAGMA user_version={target}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        logger.info(f"✅ Applied database migration {target}: {MIGRATIONS[target - 1].__name__}")
+    logger.info("✅ Database initialized successfully")
+
+def fold_into_rollups(conn, where, params=(), guild_expr="guild_id"):
+    """Add the punishments matching `where` to the daily rollups in one grouped upsert"""
+    conn.execute(
+        "INSERT INTO punishment_rollups (guild_id, day, action, moderator_id, count) "
+        f"SELECT {guild_expr}, ts / 86400000, action, COALESCE(moderator_id, 0), COUNT(*) FROM punishments "
+        f"WHERE {where} GROUP BY 1, 2, 3, 4 "
+        "ON CONFLICT (guild_id, day, action, moderator_id) DO UPDATE SET count=count+excluded.count",
+        params)
+
+def backfill_guild_ids(conn, guild_id):
+    """Assign rows logged before guild scoping to the only guild the bot serves"""
+    fold_into_rollups(conn, "guild_id IS NULL", (guild_id,), guild_expr="?")
+    score_offenses(conn, conn.execute(
+        "SELECT ?, user_id, action, ts FROM punishments WHERE guild_id IS NULL ORDER BY ts", (guild_id,)).fetchall())
+    return conn.execute("UPDATE punishments SET guild_id=? WHERE guild_id IS NULL", (guild_id,)).rowcount
 
 # ---------- PUNISHMENT LOG ----------
-def log_action(user_id, moderator_id, action, reason):
-    """Log punishment action with error handling"""
-    try:
-        with sqlite3.connect(DB_NAME) as db:
-            db.execute(
-                "INSERT INTO punishments (user_id, moderator_id, action, reason, timestamp) VALUES (?,?,?,?,?)",
-                (user_id, moderator_id, action, reason, utcnow().isoformat()))
-            db.commit()
-            logger.info(f"✅ Logged action: {action} for user {user_id}")
-    except sqlite3.Error as e:
-        logger.error(f"❌ Failed to log action: {e}")
+MAX_EPOCH_MS = 2**63 - 1
+
+def to_epoch_ms(when):
+    return int(when.timestamp() * 1000)
+
+def from_epoch_ms(ms):
+    return dt.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+DAY_MS = 86_400_000
+OFFENSE_HALF_LIFE_MS = OFFENSE_HALF_LIFE_DAYS * DAY_MS
+
+def decay_score(score, elapsed_ms):
+    """An offense score as it stands elapsed_ms after it was last written"""
+    return score * 0.5 ** (max(elapsed_ms, 0) / OFFENSE_HALF_LIFE_MS)
+
+def score_offenses(conn, offenses):
+    """Fold (guild_id, user_id, action, ts) judgments into the decaying offense scores.
+
+    Each judgment is one keyed upsert: the stored score is decayed to the
+    newer timestamp and the weight added, so the cost never depends on how
+    long a soul's record is. A late-arriving older judgment decays its own
+    weight instead.
+    """
+    conn.executemany(
+        "INSERT INTO offense_scores (guild_id, user_id, score, updated_ms) VALUES (?,?,?,?) "
+        "ON CONFLICT (guild_id, user_id) DO UPDATE SET "
+        "score=CASE WHEN excluded.updated_ms >= updated_ms THEN decay(score, excluded.updated_ms - updated_ms) + excluded.score "
+        "ELSE score + decay(excluded.score, updated_ms - excluded.updated_ms) END, "
+        "updated_ms=MAX(updated_ms, excluded.updated_ms)",
+        [(guild_id, user_id, OFFENSE_WEIGHTS[action], ts)
+         for guild_id, user_id, action, ts in offenses if guild_id is not None and action in OFFENSE_WEIGHTS])
+
+def write_punishments(conn, records):
+    """Insert a batch of punishment records and fold them into the rollups and offense scores.
+
+    Runs inside the journal's flush transaction, so neither ever disagrees
+    with the log; the batch is pre-tallied so each (guild, day,
+    action, moderator) cell costs one upsert however many rows it gained.
+    """
+    conn.executemany(
+        "INSERT INTO punishments (guild_id, user_id, moderator_id, action, reason, ts, user_name, moderator_name) "
+        "VALUES (?,?,?,?,?,?,?,?)",
+        records)
+    tallies = Counter((r[0], r[5] // DAY_MS, r[3], r[2] or 0) for r in records if r[0] is not None)
+    conn.executemany(
+        "INSERT INTO punishment_rollups (guild_id, day, action, moderator_id, count) VALUES (?,?,?,?,?) "
+        "ON CONFLICT (guild_id, day, action, moderator_id) DO UPDATE SET count=count+excluded.count",
+        [(*cell, n) for cell, n in tallies.items()])
+    score_offenses(conn, ((r[0], r[1], r[3], r[5]) for r in records))
+
+class PunishmentJournal:
+    """Write-behind queue for punishment records.
+
+    Records are appended in memory and written with one executemany and one
+    commit once the batch size is reached or the flush interval elapses, so a
+    raid costs one fsync per batch rather than one per action.
+    """
+
+    def __init__(self, database, batch_size=50, flush_interval=1.0):
+        self.db = database
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+        self.flushed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    @property
+    def depth(self):
+        return len(self._pending)
+
+    def append(self, record):
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def extend(self, records):
+        self._pending.extend(records)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write every pending record in a single transaction"""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            started = time.perf_counter()
+            try:
+                await self.db.run(write_punishments, batch)
+            except sqlite3.Error as e:
+                # Put the batch back in front so the next flush retries it in order
+                self._pending[:0] = batch
+                logger.error(f"❌ Failed to flush {len(batch)} punishment records: {e}")
+                return 0
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+            self.flushed += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background flusher and drain everything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            if not await self.flush():
+                break
+        logger.info(f"✅ Punishment journal drained ({self.flushed} records written)")
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
 
-def fetch_history(user_id):
-    """Fetch user punishment history"""
+journal = PunishmentJournal(db, JOURNAL_BATCH_SIZE, JOURNAL_FLUSH_INTERVAL)
+
+def _identity(who):
+    """Split a member/user (or a bare id) into (id, display name snapshot)"""
+    if isinstance(who, int):
+        return who, user_names.get(who)
+    name = getattr(who, "display_name", None) or getattr(who, "name", None)
+    user_names.put(who.id, name)
+    return who.id, name
+
+async def log_action(guild_id, user, moderator, action, reason):
+    """Queue a punishment record for the next group commit.
+
+    `user` and `moderator` may be members/users or bare ids; their display
+    names are stored with the row so the log renders after they leave.
+    """
+    user_id, user_name = _identity(user)
+    moderator_id, moderator_name = _identity(moderator)
+    journal.append((guild_id, user_id, moderator_id, action, reason, to_epoch_ms(utcnow()), user_name, moderator_name))
+    logger.info(f"✅ Logged action: {action} for user {user_id}")
+
+async def log_actions(guild_id, entries):
+    """Record many (user, moderator, action, reason) judgments and commit them in one transaction"""
+    ts = to_epoch_ms(utcnow())
+    records = []
+    for user, moderator, action, reason in entries:
+        user_id, user_name = _identity(user)
+        moderator_id, moderator_name = _identity(moderator)
+        records.append((guild_id, user_id, moderator_id, action, reason, ts, user_name, moderator_name))
+    journal.extend(records)
+    await journal.flush()
+    logger.info(f"✅ Logged {len(records)} judgments in guild {guild_id}")
+
+async def count_history(guild_id, user_id, start_ms=0, end_ms=MAX_EPOCH_MS):
+    """Count a user's judgments within [start_ms, end_ms) from the covering index"""
+    await journal.flush()
     try:
-        with sqlite3.connect(DB_NAME) as db:
-            cur = db.execute(
-                "SELECT action, reason, timestamp FROM punishments WHERE user_id=? ORDER BY timestamp DESC", (user_id,))
-            return cur.fetchall()
-    except sqlite3.Error as e:
+        row = await db.fetchone(
+            "SELECT COUNT(*) FROM punishments WHERE guild_id=? AND user_id=? AND ts>=? AND ts<?",
+            (guild_id, user_id, start_ms, end_ms))
+        return row[0] + await archive.count(guild_id, user_id, start_ms, end_ms)
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"❌ Failed to count history for user {user_id}: {e}")
+        return 0
+
+async def fetch_history(guild_id, user_id, start_ms=0, end_ms=MAX_EPOCH_MS, limit=10, before=None, after=None):
+    """Fetch one page of user punishment history within [start_ms, end_ms), newest first.
+
+    `before` and `after` are (ts, id) keyset cursors for the next older or newer page.
+    Archived rows are all older than hot ones, so a page that runs out of hot
+    rows continues into the archive, and a newer page starts there.
+    """
+    try:
+        if after is not None:
+            rows = []
+            if after[0] < await archive.watermark():
+                rows = (await archive.history(guild_id, user_id, start_ms, end_ms, limit, after=after))[::-1]
+            if len(rows) < limit:
+                rows += await db.fetchall(
+                    "SELECT id, action, reason, ts FROM punishments WHERE guild_id=? AND user_id=? AND ts>=? AND ts<? "
+                    "AND (ts, id)>(?, ?) ORDER BY ts ASC, id ASC LIMIT ?",
+                    (guild_id, user_id, start_ms, end_ms, *after, limit - len(rows)))
+            return rows[::-1]
+        cursor = before if before is not None else (MAX_EPOCH_MS, MAX_EPOCH_MS)
+        rows = await db.fetchall(
+            "SELECT id, action, reason, ts FROM punishments WHERE guild_id=? AND user_id=? AND ts>=? AND ts<? "
+            "AND (ts, id)<(?, ?) ORDER BY ts DESC, id DESC LIMIT ?",
+            (guild_id, user_id, start_ms, end_ms, *cursor, limit))
+        if len(rows) < limit and start_ms < await archive.watermark():
+            rows += await archive.history(guild_id, user_id, start_ms, end_ms, limit - len(rows), before=cursor)
+        return rows
+    except (sqlite3.Error, OSError) as e:
         logger.error(f"❌ Failed to fetch history for user {user_id}: {e}")
         return []
 
-def set_pillory_channel(guild_id, channel_id):
+async def fetch_court_log(guild_id, limit, start_ms=0, end_ms=MAX_EPOCH_MS):
+    """Fetch the most recent judgments; raises sqlite3.Error so the caller can report it"""
+    await journal.flush()
+    return await db.fetchall(
+        "SELECT user_id, moderator_id, action, reason, ts, user_name, moderator_name FROM punishments "
+        "WHERE guild_id=? AND ts>=? AND ts<? "
+        "ORDER BY ts DESC, id DESC LIMIT ?",
+        (guild_id, start_ms, end_ms, limit))
+
+async def offense_score(guild_id, user_id):
+    """A soul's current offense score, decayed to now; one primary-key lookup"""
+    await journal.flush()
+    row = await db.fetchone("SELECT score, updated_ms FROM offense_scores WHERE guild_id=? AND user_id=?", (guild_id, user_id))
+    return decay_score(row[0], to_epoch_ms(utcnow()) - row[1]) if row else 0.0
+
+def stocks_minutes(score):
+    """The STOCKS_LADDER sentence for an offense score"""
+    minutes = STOCKS_LADDER[0][1] if STOCKS_LADDER else 10
+    for threshold, step in STOCKS_LADDER:
+        if score >= threshold:
+            minutes = step
+    return minutes
+
+async def fetch_court_stats(guild_id, start_ms=0, end_ms=MAX_EPOCH_MS):
+    """(day, action, moderator_id, count) rollup cells for the whole UTC days touching [start_ms, end_ms)"""
+    await journal.flush()
+    return await db.fetchall(
+        "SELECT day, action, moderator_id, count FROM punishment_rollups WHERE guild_id=? AND day>=? AND day<=? "
+        "ORDER BY day",
+        (guild_id, start_ms // DAY_MS, (end_ms - 1) // DAY_MS))
+
+def summarize_court_stats(cells):
+    """Fold rollup cells into totals per action, per moderator and per day"""
+    totals, moderators, days = Counter(), {}, {}
+    for day, action, moderator_id, count in cells:
+        totals[action] += count
+        moderators.setdefault(moderator_id, Counter())[action] += count
+        days.setdefault(day, Counter())[action] += count
+    return {
+        "total": sum(totals.values()),
+        "actions": dict(totals.most_common()),
+        "moderators": sorted(
+            ({"moderator_id": mod_id, "total": sum(counts.values()), "actions": dict(counts)}
+             for mod_id, counts in moderators.items()),
+            key=lambda entry: entry["total"], reverse=True),
+        "days": [{"date": from_epoch_ms(day * DAY_MS).date().isoformat(), "total": sum(counts.values()),
+                  "actions": dict(counts)} for day, counts in sorted(days.items())],
+    }
+
+PUNISHMENT_COLUMNS = ("id", "guild_id", "user_id", "moderator_id", "action", "reason", "ts", "user_name", "moderator_name")
+
+async def iter_punishments(guild_id=None, start_ms=0, end_ms=MAX_EPOCH_MS, action=None, batch_size=1000):
+    """Yield batches of punishment rows in (ts, id) order using a keyset cursor.
+
+    Only one batch is held in memory at a time and each batch is a separate
+    indexed query on the database worker, so long exports never block the loop.
+    Archived rows come first, read one segment block at a time.
+    """
+    await journal.flush()
+    async for rows in archive.rows(start_ms, end_ms, guild_id, action=action):
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+    clauses = ["ts>=?", "ts<?", "(ts, id)>(?, ?)"]
+    if guild_id is not None:
+        clauses.insert(0, "guild_id=?")
+    if action is not None:
+        clauses.append("action=?")
+    sql = (f"SELECT {', '.join(PUNISHMENT_COLUMNS)} FROM punishments WHERE {' AND '.join(clauses)} "
+           "ORDER BY ts ASC, id ASC LIMIT ?")
+    cursor = (-1, -1)
+    while True:
+        params = [start_ms, end_ms, *cursor]
+        if guild_id is not None:
+            params.insert(0, guild_id)
+        if action is not None:
+            params.append(action)
+        rows = await db.fetchall(sql, (*params, batch_size))
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        cursor = (rows[-1][6], rows[-1][0])
+
+SEARCH_TERM = re.compile(r'"([^"]+)"|(\S+)')
+SEARCH_COLUMNS = "p.id, p.user_id, p.moderator_id, p.action, p.reason, p.ts, p.user_name, p.moderator_name"
+
+def fts_query(text, guild_id, action=None):
+    """Turn free text into a safe FTS5 expression scoped to one guild.
+
+    Every word, or "quoted phrase", must appear in the reason; a trailing *
+    on a bare word matches by prefix. Punctuation never reaches the FTS
+    parser, so links and odd characters search as plain token sequences.
+    Returns None when the text holds nothing searchable.
+    """
+    phrases = []
+    for quoted, word in SEARCH_TERM.findall(text):
+        term = quoted or word
+        prefix = not quoted and len(term) > 1 and term.endswith("*")
+        term = term.rstrip("*") if prefix else term
+        if re.search(r"\w", term):
+            phrases.append('reason:"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if not phrases:
+        return None
+    phrases.append(f'scope:"g{guild_id}"')
+    if action:
+        phrases.append(f'scope:"a{action}"')
+    return " AND ".join(phrases)
+
+async def search_punishments(guild_id, text, action=None, newest=False, limit=5, offset=0, before_id=None):
+    """Full-text search over reasons, best bm25 matches first or newest first.
+
+    Ranked pages are addressed by offset; newest-first pages use an id cursor
+    so deep pages cost no more than the first. Returns None for an empty query.
+    """
+    query = fts_query(text, guild_id, action)
+    if query is None:
+        return None
+    await journal.flush()
+    if newest:
+        hits = ("SELECT rowid, rowid AS score FROM punishments_fts WHERE punishments_fts MATCH ?"
+                + (" AND rowid<?" if before_id is not None else "") + " ORDER BY rowid DESC LIMIT ?")
+        params = (query, before_id, limit) if before_id is not None else (query, limit)
+        order = "hits.score DESC"
+    else:
+        hits = "SELECT rowid, rank AS score FROM punishments_fts WHERE punishments_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?"
+        params = (query, limit, offset)
+        order = "hits.score"
+    return await db.fetchall(
+        f"WITH hits AS ({hits}) SELECT {SEARCH_COLUMNS} FROM hits JOIN punishments p ON p.id=hits.rowid ORDER BY {order}",
+        params)
+
+# ---------- ARCHIVE ----------
+ARCHIVE_BLOCK_ROWS = 2000
+BLOOM_HASHES = 7
+
+def _bloom_positions(key, bits):
+    data = key.encode()
+    h1, h2 = zlib.crc32(data), zlib.adler32(data) | 1
+    return [(h1 + i * h2) % bits for i in range(BLOOM_HASHES)]
+
+def bloom_build(keys):
+    """Bloom filter at ~10 bits per key (about 1% false positives)"""
+    bits = max(1024, len(keys) * 10)
+    bits += -bits % 8
+    array = bytearray(bits // 8)
+    for key in keys:
+        for position in _bloom_positions(key, bits):
+            array[position >> 3] |= 1 << (position & 7)
+    return bytes(array)
+
+def bloom_contains(bloom, key):
+    return all(bloom[p >> 3] & (1 << (p & 7)) for p in _bloom_positions(key, len(bloom) * 8))
+
+class PunishmentArchive:
+    """Cold storage for old judgments in zlib-compressed monthly segments, indexed by archive_blocks"""
+
+    def __init__(self, database, directory, cache_blocks=32):
+        self.db = database
+        self.directory = directory
+        self.cache_blocks = cache_blocks
+        self.archived = 0
+        self._warned_full_vacuum = False
+        self._cache = OrderedDict()
+        self._task = None
+
+    async def watermark(self):
+        """Every archived row has ts below this; one seek on idx_archive_blocks_ts"""
+        row = await self.db.fetchone("SELECT MAX(max_ts) FROM archive_blocks")
+        return row[0] + 1 if row and row[0] is not None else 0
+
+    def _archive_block(self, conn, cutoff_ms):
+        """Move the oldest block's worth of rows older than cutoff_ms into its month's segment"""
+        first = conn.execute("SELECT ts FROM punishments WHERE ts<? ORDER BY ts LIMIT 1", (cutoff_ms,)).fetchone()
+        if first is None:
+            return 0
+        month = from_epoch_ms(first[0]).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        month_end = to_epoch_ms((month + timedelta(days=32)).replace(day=1))
+        rows = conn.execute(
+            f"SELECT {', '.join(PUNISHMENT_COLUMNS)} FROM punishments WHERE ts<? ORDER BY ts, id LIMIT ?",
+            (min(cutoff_ms, month_end), ARCHIVE_BLOCK_ROWS)).fetchall()
+        payload = zlib.compress("\n".join(json.dumps(row) for row in rows).encode(), 6)
+        segment = f"{month:%Y-%m}.seg"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, segment), "ab") as f:
+            offset = f.tell()
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        keys = {f"g{row[1]}" for row in rows} | {f"g{row[1]}u{row[2]}" for row in rows}
+        conn.execute(
+            "INSERT INTO archive_blocks (segment, byte_offset, byte_length, rows, min_ts, max_ts, bloom) VALUES (?,?,?,?,?,?,?)",
+            (segment, offset, len(payload), len(rows), rows[0][6], rows[-1][6], bloom_build(keys)))
+        conn.executemany("DELETE FROM punishments WHERE id=?", [(row[0],) for row in rows])
+        return len(rows)
+
+    async def sweep(self, retention_days):
+        """Archive everything older than retention_days, one block per transaction, then reclaim the space"""
+        await journal.flush()
+        cutoff = to_epoch_ms(utcnow() - timedelta(days=retention_days))
+        moved = 0
+        while True:
+            count = await self.db.run(self._archive_block, cutoff)
+            if not count:
+                break
+            moved += count
+        if moved:
+            self.archived += moved
+            freed = await self.db.reclaim()
+            logger.info(f"✅ Archived {moved} judgments older than {retention_days} days, reclaimed {freed or 0} pages")
+            if freed is None and not self._warned_full_vacuum:
+                self._warned_full_vacuum = True
+                logger.warning("⚠️ The database predates incremental auto-vacuum; freed pages are reused but the file "
+                               "only shrinks after one restart with VACUUM_ON_START=1")
+        return moved
+
+    def _load_block(self, segment, offset, length):
+        with open(os.path.join(self.directory, segment), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        return [tuple(json.loads(line)) for line in zlib.decompress(data).decode().splitlines()]
+
+    async def _read(self, block_id, segment, offset, length):
+        rows = self._cache.get(block_id)
+        if rows is None:
+            rows = await asyncio.get_running_loop().run_in_executor(None, self._load_block, segment, offset, length)
+            self._cache[block_id] = rows
+            if len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(block_id)
+        return rows
+
+    async def rows(self, start_ms=0, end_ms=MAX_EPOCH_MS, guild_id=None, user_id=None, action=None, newest_first=False):
+        """Yield lists of archived rows (PUNISHMENT_COLUMNS order) matching the filters, one block at a time"""
+        if start_ms >= await self.watermark():
+            return
+        key = None
+        if guild_id is not None:
+            key = f"g{guild_id}u{user_id}" if user_id is not None else f"g{guild_id}"
+        blocks = await self.db.fetchall(
+            "SELECT id, segment, byte_offset, byte_length, bloom FROM archive_blocks WHERE max_ts>=? AND min_ts<? "
+            f"ORDER BY id {'DESC' if newest_first else 'ASC'}", (start_ms, end_ms))
+        for block_id, segment, offset, length, bloom in blocks:
+            if key is not None and not bloom_contains(bloom, key):
+                continue
+            matched = [row for row in await self._read(block_id, segment, offset, length)
+                       if start_ms <= row[6] < end_ms
+                       and (guild_id is None or row[1] == guild_id)
+                       and (user_id is None or row[2] == user_id)
+                       and (action is None or row[4] == action)]
+            if matched:
+                yield matched[::-1] if newest_first else matched
+
+    async def history(self, guild_id, user_id, start_ms, end_ms, limit, before=None, after=None):
+        """One page of a user's archived judgments as (id, action, reason, ts), newest first"""
+        page = []
+        async for rows in self.rows(start_ms, end_ms, guild_id, user_id, newest_first=after is None):
+            for row in rows:
+                key = (row[6], row[0])
+                if (before is not None and key >= tuple(before)) or (after is not None and key <= tuple(after)):
+                    continue
+                page.append((row[0], row[4], row[5], row[6]))
+                if len(page) == limit:
+                    return page[::-1] if after is not None else page
+        return page[::-1] if after is not None else page
+
+    async def count(self, guild_id, user_id, start_ms, end_ms):
+        total = 0
+        async for rows in self.rows(start_ms, end_ms, guild_id, user_id):
+            total += len(rows)
+        return total
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep(RETENTION_DAYS)
+            except (sqlite3.Error, OSError) as e:
+                logger.error(f"❌ Archive sweep failed: {e}")
+            await asyncio.sleep(RETENTION_INTERVAL)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {"archived": self.archived, "cached_blocks": len(self._cache)}
+
+archive = PunishmentArchive(db, ARCHIVE_DIR)
+
+# ---------- GUILD CONFIG ----------
+GUILD_CONFIG_COLUMNS = ("pillory_channel", "decree_channel")
+
+class GuildConfigCache:
+    """In-memory copy of guild_config, loaded in bulk at startup and kept current write-through"""
+
+    def __init__(self, database):
+        self.db = database
+        self._configs = {}
+
+    async def load(self):
+        rows = await self.db.fetchall(f"SELECT guild_id, {', '.join(GUILD_CONFIG_COLUMNS)} FROM guild_config")
+        self._configs = {row[0]: dict(zip(GUILD_CONFIG_COLUMNS, row[1:])) for row in rows}
+        logger.info(f"✅ Loaded configuration for {len(self._configs)} guilds")
+
+    def get(self, guild_id, column):
+        config = self._configs.get(guild_id)
+        return config.get(column) if config else None
+
+    async def set(self, guild_id, column, value):
+        """Upsert a single column so the other settings of the guild survive"""
+        if column not in GUILD_CONFIG_COLUMNS:
+            raise ValueError(f"Unknown guild config column: {column}")
+        await self.db.execute(
+            f"INSERT INTO guild_config (guild_id, {column}) VALUES (?,?) "
+            f"ON CONFLICT(guild_id) DO UPDATE SET {column}=excluded.{column}",
+            (guild_id, value))
+        self._configs.setdefault(guild_id, dict.fromkeys(GUILD_CONFIG_COLUMNS))[column] = value
+
+guild_config = GuildConfigCache(db)
+
+async def set_pillory_channel(guild_id, channel_id):
     """Set pillory channel with error handling"""
     try:
-        with sqlite3.connect(DB_NAME) as db:
-            db.execute("INSERT OR REPLACE INTO guild_config (guild_id, pillory_channel) VALUES (?,?)", (guild_id, channel_id))
-            db.commit()
-            logger.info(f"✅ Set pillory channel for guild {guild_id}")
+        await guild_config.set(guild_id, "pillory_channel", channel_id)
+        logger.info(f"✅ Set pillory channel for guild {guild_id}")
     except sqlite3.Error as e:
         logger.error(f"❌ Failed to set pillory channel: {e}")
 
 def get_pillory_channel(guild_id):
     """Get pillory channel"""
-    try:
-        with sqlite3.connect(DB_NAME) as db:
-            row = db.execute("SELECT pillory_channel FROM guild_config WHERE guild_id=?", (guild_id,)).fetchone()
-            return row[0] if row else None
-    except sqlite3.Error as e:
-        logger.error(f"❌ Failed to get pillory channel for guild {guild_id}: {e}")
-        return None
+    return guild_config.get(guild_id, "pillory_channel")
 
-def set_decree_channel(guild_id, channel_id):
+async def set_decree_channel(guild_id, channel_id):
     """Set decree channel with error handling"""
     try:
-        with sqlite3.connect(DB_NAME) as db:
-            db.execute("INSERT OR REPLACE INTO guild_config (guild_id, decree_channel) VALUES (?,?)", (guild_id, channel_id))
-            db.commit()
-            logger.info(f"✅ Set decree channel for guild {guild_id}")
+        await guild_config.set(guild_id, "decree_channel", channel_id)
+        logger.info(f"✅ Set decree channel for guild {guild_id}")
     except sqlite3.Error as e:
         logger.error(f"❌ Failed to set decree channel: {e}")
 
 def get_decree_channel(guild_id):
     """Get decree channel"""
-    try:
-        with sqlite3.connect(DB_NAME) as db:
-            row = db.execute("SELECT decree_channel FROM guild_config WHERE guild_id=?", (guild_id,)).fetchone()
-            return row[0] if row else None
-    except sqlite3.Error as e:
-        logger.error(f"❌ Failed to get decree channel for guild {guild_id}: {e}")
-        return None
+    return guild_config.get(guild_id, "decree_channel")
+
+# ---------- TIME RANGES ----------
+DURATION_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def _parse_time_point(text, end=False):
+    """Turn '7d' (ago) or an ISO date into an aware datetime; date-only ends cover the whole day"""
+    match = re.fullmatch(r"(\d+)([mhdw])", text)
+    if match:
+        return utcnow() - timedelta(seconds=int(match[1]) * DURATION_UNITS[match[2]])
+    when = dt.fromisoformat(text)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    if end and len(text) == 10:
+        when += timedelta(days=1)
+    return when
+
+class TimeRange(commands.Converter):
+    """Parse `since 7d`, `since 2025-01-01` or `between 2025-01-01 2025-02-01` into epoch ms bounds"""
+
+    async def convert(self, ctx, argument):
+        words = [w for w in argument.lower().split() if w != "and"]
+        try:
+            if len(words) == 2 and words[0] == "since":
+                start, end = _parse_time_point(words[1]), None
+            elif len(words) == 3 and words[0] == "between":
+                start, end = _parse_time_point(words[1]), _parse_time_point(words[2], end=True)
+            else:
+                raise ValueError(argument)
+        except ValueError:
+            raise commands.BadArgument(f'Period "{argument}" could not be understood.')
+        if end is not None and end <= start:
+            raise commands.BadArgument(f'Period "{argument}" endeth before it beginneth.')
+        self.start, self.end = start, end
+        self.start_ms = to_epoch_ms(start)
+        self.end_ms = to_epoch_ms(end) if end else MAX_EPOCH_MS
+        return self
+
+    def describe(self):
+        if self.end is None:
+            return f"since <t:{int(self.start.timestamp())}:f>"
+        return f"between <t:{int(self.start.timestamp())}:d> and <t:{int(self.end.timestamp())}:d>"
+
+class Duration(commands.Converter):
+    """Parse a sentence length such as `30m`, `12h`, `7d` or `2w` into a timedelta"""
+
+    async def convert(self, ctx, argument):
+        match = re.fullmatch(r"(\d+)([mhdw])", argument.lower())
+        if not match:
+            raise commands.BadArgument(f'Duration "{argument}" is not a span like 7d.')
+        return timedelta(seconds=int(match[1]) * DURATION_UNITS[match[2]])
 
 def can_act_on(target: discord.Member, ctx):
     """Check if bot can act on target member"""
-    if target == ctx.guild.owner:
+    if target.id == ctx.guild.owner_id:
         return False, "The sovereign monarch may not be judged, noble sir."
     if target == ctx.guild.me:
         return False, "One may not pass sentence upon oneself, good sirrah."
@@ -181,9 +1518,506 @@ def can_act_on(target: discord.Member, ctx):
         return False, "The target beareth greater station than the Crown's agent, m'lord."
     return True, ""
 
+# ---------- SENTENCES ----------
+TIMEOUT_CAP = timedelta(days=28)  # Discord refuses timeouts longer than 40320 minutes
+TIMEOUT_RENEW_MARGIN = timedelta(minutes=5)
+SENTENCE_MAX_MINUTES = 525600
+
+class SentenceScheduler:
+    """Persisted expiry scheduler for temp-bans and sentences longer than a Discord timeout.
+
+    Every pending sentence lives in the indexed `sentences` table; only those
+    due within `horizon` seconds (at most `window` of them) are kept in an
+    in-memory heap served by one timer task. Startup and every refill are a
+    single range scan on due_ms, so pending volume never becomes tasks or RAM.
+    """
+
+    def __init__(self, database, horizon=3600.0, window=2000):
+        self.db = database
+        self.horizon_ms = int(horizon * 1000)
+        self.window = window
+        self._heap = []
+        self._loaded = set()
+        self._loaded_until = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.fired = 0
+
+    @staticmethod
+    def _shard_filter():
+        """In a cluster worker only the guilds on this worker's shards are ours to serve"""
+        if SHARD_IDS and SHARD_COUNT and SHARD_COUNT != "auto":
+            return f" AND ((guild_id >> 22) % {int(SHARD_COUNT)}) IN ({','.join(map(str, SHARD_IDS))})"
+        return ""
+
+    async def load(self):
+        """Pull the nearest sentences into the heap with one indexed range scan"""
+        horizon = to_epoch_ms(utcnow()) + self.horizon_ms
+        shard_sql = self._shard_filter()
+        rows = await self.db.fetchall(
+            "SELECT id, guild_id, user_id, action, due_ms, until_ms, reason FROM sentences "
+            f"WHERE due_ms<?{shard_sql} ORDER BY due_ms LIMIT ?",
+            (horizon, self.window))
+        for row in rows:
+            if row[0] not in self._loaded:
+                self._loaded.add(row[0])
+                heapq.heappush(self._heap, (row[4], row))
+        # A full window may have cut through the horizon; only trust what we actually read
+        self._loaded_until = rows[-1][4] - 1 if len(rows) == self.window else horizon
+
+    async def add(self, guild_id, user_id, action, due, until, reason):
+        due_ms, until_ms = to_epoch_ms(due), to_epoch_ms(until)
+
+        def insert(conn):
+            return conn.execute(
+                "INSERT INTO sentences (guild_id, user_id, action, due_ms, until_ms, reason) VALUES (?,?,?,?,?,?)",
+                (guild_id, user_id, action, due_ms, until_ms, reason)).lastrowid
+
+        sentence_id = await self.db.run(insert)
+        if due_ms <= self._loaded_until:
+            row = (sentence_id, guild_id, user_id, action, due_ms, until_ms, reason)
+            self._loaded.add(sentence_id)
+            heapq.heappush(self._heap, (due_ms, row))
+            self._wakeup.set()
+
+    async def cancel(self, guild_id, user_id, action):
+        """Forget pending sentences of one kind for a user; heap copies are skipped when they surface"""
+        def delete(conn):
+            ids = [r[0] for r in conn.execute(
+                "SELECT id FROM sentences WHERE guild_id=? AND user_id=? AND action=?", (guild_id, user_id, action))]
+            conn.executemany("DELETE FROM sentences WHERE id=?", [(i,) for i in ids])
+            return ids
+
+        for sentence_id in await self.db.run(delete):
+            self._loaded.discard(sentence_id)
+
+    async def pending_timeout(self, guild_id, user_id):
+        """Latest end of an unfinished long timeout for this user, or None"""
+        row = await self.db.fetchone(
+            "SELECT MAX(until_ms) FROM sentences WHERE guild_id=? AND user_id=? AND action='retimeout'",
+            (guild_id, user_id))
+        return row[0] if row and row[0] and row[0] > to_epoch_ms(utcnow()) else None
+
+    async def _execute(self, row):
+        """Carry out one due sentence; returns a new due_ms to reschedule or None when finished"""
+        sentence_id, guild_id, user_id, action, due_ms, until_ms, reason = row
+        guild = bot.get_guild(guild_id)
+        if guild is None:
+            return None
+        now = utcnow()
+        try:
+            if action == "unban":
+                try:
+                    with metrics.discord_api["ban"].time():
+                        await guild.unban(discord.Object(id=user_id), reason="Sentence of banishment served")
+                except discord.NotFound:
+                    return None
+                await log_action(guild_id, user_id, guild.me, "pardon", f"Banishment served: {reason}")
+                return None
+            if action == "retimeout":
+                remaining = from_epoch_ms(until_ms) - now
+                if remaining <= timedelta(0):
+                    return None
+                member = guild.get_member(user_id)
+                if member is None:
+                    try:
+                        member = await guild.fetch_member(user_id)
+                    except discord.NotFound:
+                        # They fled; on_member_join binds them again if they return before until_ms
+                        return until_ms
+                with metrics.discord_api["timeout"].time():
+                    await member.timeout(now + min(remaining, TIMEOUT_CAP), reason=f"Sentence continues: {reason}")
+                if remaining > TIMEOUT_CAP:
+                    return to_epoch_ms(now + TIMEOUT_CAP - TIMEOUT_RENEW_MARGIN)
+                return None
+        except discord.Forbidden as e:
+            logger.error(f"❌ Sentence {sentence_id} could not be carried out: {e}")
+            return None
+        except discord.HTTPException as e:
+            logger.warning(f"⚠️ Sentence {sentence_id} failed, retrying in a minute: {e}")
+            return to_epoch_ms(now) + 60_000
+        return None
+
+    async def _fire(self, rows):
+        semaphore = asyncio.Semaphore(MASS_ACTION_CONCURRENCY)
+
+        async def guarded(row):
+            async with semaphore:
+                return row, await self._execute(row)
+
+        outcomes = await asyncio.gather(*(guarded(row) for row in rows))
+        finished = [(row[0],) for row, next_due in outcomes if next_due is None]
+        rescheduled = [(next_due, row[0]) for row, next_due in outcomes if next_due is not None]
+
+        def persist(conn):
+            conn.executemany("DELETE FROM sentences WHERE id=?", finished)
+            conn.executemany("UPDATE sentences SET due_ms=? WHERE id=?", rescheduled)
+
+        try:
+            await self.db.run(persist)
+        except sqlite3.Error:
+            # The rows are still in the table; forget them as loaded and reload within a minute so they fire again
+            self._loaded.difference_update(row[0] for row in rows)
+            self._loaded_until = min(self._loaded_until, to_epoch_ms(utcnow()) + 60_000)
+            raise
+        for row, next_due in outcomes:
+            self._loaded.discard(row[0])
+            if next_due is not None and next_due <= self._loaded_until:
+                self._loaded.add(row[0])
+                heapq.heappush(self._heap, (next_due, (*row[:4], next_due, *row[5:])))
+        self.fired += len(rows)
+
+    async def _run(self):
+        await bot.wait_until_ready()
+        while True:
+            now = to_epoch_ms(utcnow())
+            if now >= self._loaded_until:
+                try:
+                    await self.load()
+                except sqlite3.Error as e:
+                    logger.error(f"❌ Failed to load sentences: {e}")
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                _, row = heapq.heappop(self._heap)
+                if row[0] in self._loaded:
+                    due.append(row)
+            if due:
+                try:
+                    await self._fire(due)
+                except sqlite3.Error as e:
+                    logger.error(f"❌ Failed to record {len(due)} served sentences: {e}")
+                continue
+            next_at = min(self._heap[0][0], self._loaded_until) if self._heap else self._loaded_until
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.05, (next_at - now) / 1000))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+sentences = SentenceScheduler(db)
+
+async def bind_member(member, until, audit_reason):
+    """Time a member out until `until`, renewing past Discord's 28-day cap through the scheduler"""
+    now = utcnow()
+    with metrics.discord_api["timeout"].time():
+        await member.timeout(min(until, now + TIMEOUT_CAP), reason=audit_reason)
+    try:
+        await sentences.cancel(member.guild.id, member.id, "retimeout")
+        if until - now > TIMEOUT_CAP:
+            await sentences.add(member.guild.id, member.id, "retimeout",
+                                now + TIMEOUT_CAP - TIMEOUT_RENEW_MARGIN, until, audit_reason)
+    except sqlite3.Error as e:
+        logger.error(f"❌ Failed to record sentence for {member.id}: {e}")
+
+# ---------- AUTOMOD ----------
+class _Track:
+    __slots__ = ("recent", "mentions", "mention_total")
+
+    def __init__(self, depth):
+        self.recent = deque(maxlen=depth)  # (stamp, content hash) of the latest messages
+        self.mentions = deque()            # (stamp, count) of messages that pinged anyone
+        self.mention_total = 0
+
+class AutoModerator:
+    """Sliding-window flood, duplicate and mention-spam detection for on_message.
+
+    Each (channel, author) pair owns one small fixed-size track; tracks live
+    in an LRU so memory stays bounded however many people are talking. A
+    check is a handful of deque operations and a string hash, so it costs
+    microseconds and never touches the database or the network.
+    """
+
+    BREACHES = {
+        "flood": "flooding the hall with messages",
+        "duplicates": "crying the same words over and over",
+        "mentions": "summoning half the realm at once",
+    }
+
+    def __init__(self, window, max_messages, max_duplicates, max_mentions, max_tracks=50000):
+        self.window = window
+        self.max_messages = max_messages
+        self.max_duplicates = max_duplicates
+        self.max_mentions = max_mentions
+        self.max_tracks = max_tracks
+        self._depth = max(max_messages, max_duplicates)
+        self._tracks = OrderedDict()
+        self._pending = set()
+        self.checked = 0
+        self.tripped = 0
+
+    def check(self, key, content, mention_count, now):
+        """Record one message; returns the breach it commits, or None"""
+        self.checked += 1
+        track = self._tracks.get(key)
+        if track is None:
+            track = self._tracks[key] = _Track(self._depth)
+            if len(self._tracks) > self.max_tracks:
+                self._tracks.popitem(last=False)
+        else:
+            self._tracks.move_to_end(key)
+
+        horizon = now - self.window
+        digest = hash(content) if content else None
+        recent = track.recent
+        recent.append((now, digest))
+        breach = None
+        if len(recent) >= self.max_messages and recent[-self.max_messages][0] > horizon:
+            breach = "flood"
+        elif digest is not None and sum(1 for stamp, d in recent if d == digest and stamp > horizon) >= self.max_duplicates:
+            breach = "duplicates"
+        else:
+            mentions = track.mentions
+            while mentions and mentions[0][0] <= horizon:
+                track.mention_total -= mentions.popleft()[1]
+            if mention_count:
+                mentions.append((now, mention_count))
+                track.mention_total += mention_count
+                if track.mention_total >= self.max_mentions:
+                    breach = "mentions"
+        if breach:
+            # Start the offender afresh so one burst earns one sentence
+            del self._tracks[key]
+            self.tripped += 1
+        return breach
+
+    async def sentence(self, message, breach):
+        """Put the author in the stocks through the same path as !stocks"""
+        guild, member = message.guild, message.author
+        key = (guild.id, member.id)
+        if key in self._pending or not isinstance(member, discord.Member) or member.is_timed_out():
+            return
+        if member.id == guild.owner_id or member.guild_permissions.manage_messages:
+            return
+        me = guild.me
+        if not me.guild_permissions.moderate_members or member.top_role >= me.top_role:
+            return
+
+        self._pending.add(key)
+        reason = f"Automod: {self.BREACHES[breach]}"
+        try:
+            minutes = max(AUTOMOD_STOCKS_MINUTES, stocks_minutes(await offense_score(guild.id, member.id)))
+            until = utcnow() + timedelta(minutes=minutes)
+            await bind_member(member, until, reason)
+            await log_action(guild.id, member, me, "stocks", f"{minutes} minutes: {reason}")
+        except discord.HTTPException as e:
+            logger.warning(f"⚠️ Automod could not silence {member.id}: {e}")
+            return
+        finally:
+            self._pending.discard(key)
+
+        embed = medieval_embed(
+            title="🔒  ROYAL SILENCE",
+            description=f"**{member.display_name}** is locked in the stocks for {self.BREACHES[breach]}!\n\n**Until:** <t:{int(until.timestamp())}:R>",
+            color_name="orange"
+        )
+        herald.post(message.channel, PRIORITY_NOTICE, coalesce=f"automod-{member.id}", embed=embed)
+
+    def stats(self):
+        return {"tracks": len(self._tracks), "checked": self.checked, "tripped": self.tripped}
+
+automod = AutoModerator(AUTOMOD_WINDOW, AUTOMOD_MAX_MESSAGES, AUTOMOD_MAX_DUPLICATES, AUTOMOD_MAX_MENTIONS)
+
+# ---------- RAID GUARD ----------
+async def dispatch_judgments(guild, targets, action, audit_reason):
+    """Ban or kick many targets with at most MASS_ACTION_CONCURRENCY requests in flight.
+
+    Returns the targets dealt with and (id, error) pairs for the rest; the
+    caller logs the former in one log_actions batch.
+    """
+    semaphore = asyncio.Semaphore(MASS_ACTION_CONCURRENCY)
+
+    async def sentence(target):
+        async with semaphore:
+            try:
+                if action == "banish":
+                    with metrics.discord_api["ban"].time():
+                        await guild.ban(target, reason=audit_reason, delete_message_days=0)
+                else:
+                    with metrics.discord_api["kick"].time():
+                        await guild.kick(target, reason=audit_reason)
+                return target, None
+            except discord.HTTPException as e:
+                return target, e
+
+    results = await asyncio.gather(*(sentence(target) for target in targets))
+    done = [target for target, error in results if error is None]
+    failed = [(target.id, f"{type(error).__name__}: {error.text or error.status}") for target, error in results if error is not None]
+    return done, failed
+
+NAME_DIGITS = re.compile(r"\d+")
+
+def name_pattern(name):
+    """Collapse case and digit runs so raider01 ... raider99 share one pattern"""
+    return NAME_DIGITS.sub("#", name.lower())
+
+class _GuildWatch:
+    __slots__ = ("joins", "raid_since", "raid_until", "handled", "flush_task", "lift_task", "restore_level")
+
+    def __init__(self, depth):
+        self.joins = deque(maxlen=depth)  # ring of (stamp, id, created_at, name, avatar key, bot)
+        self.raid_since = None
+        self.raid_until = 0.0
+        self.handled = set()
+        self.flush_task = None
+        self.lift_task = None
+        self.restore_level = None
+
+class RaidGuard:
+    """Spot join raids from per-guild join rings and answer them by lockdown or bulk judgment"""
+
+    def __init__(self, threshold, window, action, cluster=3, young_days=7, cooldown=300.0, debounce=2.0, depth=512):
+        self.threshold = threshold
+        self.window = window
+        self.action = action
+        self.cluster = cluster
+        self.young = timedelta(days=young_days)
+        self.cooldown = cooldown
+        self.debounce = debounce
+        self.depth = depth
+        self._watches = {}
+        self._next_prune = 0.0
+        self.raids = 0
+        self.judged = 0
+
+    def observe(self, member, now):
+        """Record a join; returns True while the guild is under a raid alarm"""
+        if now >= self._next_prune:
+            self._prune(now)
+        watch = self._watches.get(member.guild.id)
+        if watch is None:
+            watch = self._watches[member.guild.id] = _GuildWatch(self.depth)
+        joins = watch.joins
+        joins.append((now, member.id, member.created_at, member.name, member.avatar.key if member.avatar else None, member.bot))
+        if watch.raid_since is None:
+            while joins[0][0] <= now - self.window:
+                joins.popleft()
+            if len(joins) < self.threshold:
+                return False
+            watch.raid_since = joins[-self.threshold][0]
+            self.raids += 1
+            logger.warning(f"⚠️ Join raid on guild {member.guild.id}: {self.threshold} joins within {self.window:g}s")
+            if self.action == "lockdown":
+                asyncio.create_task(self._lock(member.guild, watch))
+        watch.raid_until = now + self.cooldown
+        if watch.lift_task is None:
+            watch.lift_task = asyncio.create_task(self._stand_down(member.guild, watch))
+        if watch.flush_task is None and self.action in ("castout", "banish"):
+            watch.flush_task = asyncio.create_task(self._sweep(member.guild, watch))
+        return True
+
+    def _prune(self, now):
+        """Forget guilds that are not under a raid and have had no join within the window"""
+        self._next_prune = now + self.window
+        quiet = now - self.window
+        for guild_id in [guild_id for guild_id, watch in self._watches.items()
+                         if watch.raid_since is None and watch.joins[-1][0] <= quiet]:
+            del self._watches[guild_id]
+
+    def suspects(self, watch):
+        """Cluster the raid's joiners and return (id, name) of those not yet dealt with that look like raiders"""
+        joiners = [(user_id, created.replace(minute=0, second=0, microsecond=0), created, name, name_pattern(name), avatar)
+                   for stamp, user_id, created, name, avatar, is_bot in watch.joins
+                   if stamp >= watch.raid_since and not is_bot]
+        hours = Counter(joiner[1] for joiner in joiners)
+        names = Counter(joiner[4] for joiner in joiners)
+        avatars = Counter(joiner[5] for joiner in joiners)
+        young = utcnow() - self.young
+        found = []
+        for user_id, hour, created, name, pattern, avatar in joiners:
+            if user_id in watch.handled:
+                continue
+            signs = ((created > young)
+                     + (hours[hour] >= self.cluster)
+                     + (names[pattern] >= self.cluster)
+                     + (avatars[avatar] >= self.cluster))
+            if signs >= 2:
+                found.append((user_id, name))
+        return found
+
+    async def _sweep(self, guild, watch):
+        await asyncio.sleep(self.debounce)
+        watch.flush_task = None
+        suspects = self.suspects(watch)
+        watch.handled.update(user_id for user_id, _ in suspects)
+        if not suspects:
+            return
+        me = guild.me
+        needed = "ban_members" if self.action == "banish" else "kick_members"
+        if not getattr(me.guild_permissions, needed):
+            logger.error(f"❌ Raid on guild {guild.id} but the bot lacks {needed}")
+            return
+        targets = []
+        for user_id, name in suspects:
+            member = guild.get_member(user_id)
+            if user_id == guild.owner_id or (member is not None and member.top_role >= me.top_role):
+                continue
+            user_names.put(user_id, name)
+            # Evicted from the lazy cache or already gone; the ban still lands by id
+            targets.append(member or discord.Object(user_id))
+        reason = "Raid guard: joined in a coordinated raid"
+        done, failed = await dispatch_judgments(guild, targets, self.action, reason)
+        if done:
+            await log_actions(guild.id, [(target.id, me, self.action, reason) for target in done])
+        self.judged += len(done)
+        verb = "banished" if self.action == "banish" else "cast out"
+        self._announce(guild, f"The gates were stormed! **{len(done)}** raiders {verb}"
+                              + (f", **{len(failed)}** escaped judgment." if failed else "."))
+
+    async def _lock(self, guild, watch):
+        if not guild.me.guild_permissions.manage_guild:
+            logger.error(f"❌ Raid on guild {guild.id} but the bot lacks manage_guild to lock the gates")
+            return
+        previous = guild.verification_level
+        if previous >= discord.VerificationLevel.highest:
+            return
+        try:
+            await guild.edit(verification_level=discord.VerificationLevel.highest, reason="Raid guard: lockdown")
+        except discord.HTTPException as e:
+            logger.error(f"❌ Failed to lock down guild {guild.id}: {e}")
+            return
+        watch.restore_level = previous
+        self._announce(guild, "The gates are barred! Only verified travellers may enter until the raid subsides.")
+
+    async def _stand_down(self, guild, watch):
+        """Wait for joins to go quiet, then lift any lockdown and forget the raid"""
+        now = time.monotonic()
+        while now < watch.raid_until:
+            await asyncio.sleep(watch.raid_until - now)
+            now = time.monotonic()
+        if watch.restore_level is not None:
+            try:
+                await guild.edit(verification_level=watch.restore_level, reason="Raid guard: raid subsided")
+                self._announce(guild, "The raid hath subsided; the gates stand open once more.")
+            except discord.HTTPException as e:
+                logger.error(f"❌ Failed to lift lockdown on guild {guild.id}: {e}")
+        self._watches.pop(guild.id, None)
+
+    def _announce(self, guild, text):
+        channel = guild.get_channel(get_decree_channel(guild.id) or 0) or guild.system_channel
+        if channel is not None:
+            herald.post(channel, PRIORITY_NOTICE, embed=medieval_embed(title="🛡️  RAID GUARD", description=text, color_name="red"))
+
+    def stats(self):
+        return {"watching": len(self._watches), "raids": self.raids, "judged": self.judged}
+
+raid_guard = RaidGuard(RAID_JOINS, RAID_WINDOW, RAID_ACTION, cluster=RAID_CLUSTER, young_days=RAID_YOUNG_DAYS)
+
 # ---------- WEB SERVER FOR RENDER ----------
+import aiohttp
 from aiohttp import web
-import asyncio
 
 async def health_check(request):
     """Health check endpoint for Render"""
@@ -193,26 +2027,190 @@ async def ping_endpoint(request):
     """Keep-alive ping endpoint"""
     return web.Response(text="⚔️ Bot heartbeat active!")
 
+class StatusSnapshot:
+    """Guild and member totals kept as counters, served from a pre-serialized JSON body.
+
+    Gateway events adjust the counters in O(1); the body and its ETag are only
+    rebuilt when a counter changed or the snapshot is older than `ttl` seconds,
+    so a poll returns cached bytes or a bare 304.
+    """
+
+    def __init__(self, ttl=5.0):
+        self.ttl = ttl
+        self.guilds = 0
+        self.users = 0
+        self._body = None
+        self._etag = None
+        self._built_at = 0.0
+
+    def reset(self, guilds):
+        """Recount from scratch; only done when the gateway (re)delivers the guild list"""
+        self.guilds = len(guilds)
+        self.users = sum(g.member_count or 0 for g in guilds)
+        self._body = None
+
+    def adjust(self, guilds=0, users=0):
+        self.guilds += guilds
+        self.users += users
+        self._body = None
+
+    def render(self):
+        now = time.monotonic()
+        if self._body is None or now - self._built_at > self.ttl:
+            uptime = utcnow() - bot.start_time
+            self._body = json.dumps({
+                "status": "online",
+                "guilds": self.guilds,
+                "users": self.users,
+                "uptime": str(uptime).split('.')[0],  # Remove microseconds
+                "commands": len(bot.commands),
+                "journal": journal.stats(),
+                "loop_lag_ms": watchdog.percentiles(),
+                "herald": herald.stats(),
+                "automod": automod.stats(),
+                "raid_guard": raid_guard.stats(),
+                "archive": archive.stats(),
+                **self._shard_status()
+            }).encode()
+            self._etag = f'"{zlib.crc32(self._body):08x}"'
+            self._built_at = now
+        return self._body, self._etag
+
+    def _shard_status(self):
+        if not isinstance(bot, commands.AutoShardedBot):
+            return {}
+        return {
+            "cluster": CLUSTER_ID,
+            "shards": [
+                {"id": shard_id, "latency_ms": None if math.isnan(info.latency) else round(info.latency * 1000, 1),
+                 "closed": info.is_closed()}
+                for shard_id, info in sorted(bot.shards.items())
+            ],
+        }
+
+status_snapshot = StatusSnapshot()
+
 async def status_endpoint(request):
     """Bot status endpoint"""
     if bot.is_ready():
-        uptime = utcnow() - bot.start_time
-        return web.json_response({
-            "status": "online",
-            "guilds": len(bot.guilds),
-            "users": sum(g.member_count for g in bot.guilds),
-            "uptime": str(uptime).split('.')[0],  # Remove microseconds
-            "commands": len(bot.commands)
-        })
+        body, etag = status_snapshot.render()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/json", headers=headers)
     else:
         return web.json_response({"status": "starting"}, status=503)
 
+EXPORT_BATCH_SIZE = 1000
+
+def _export_chunk(rows, fmt, header=False):
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if header:
+            writer.writerow(PUNISHMENT_COLUMNS)
+        writer.writerows(rows)
+        return buf.getvalue().encode()
+    return "".join(json.dumps(dict(zip(PUNISHMENT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows).encode()
+
+def _require_token(request):
+    """Gate private routes behind `Authorization: Bearer <EXPORT_TOKEN>`; hidden entirely when no token is set"""
+    if not EXPORT_TOKEN:
+        raise web.HTTPNotFound()
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied.encode(), EXPORT_TOKEN.encode()):
+        raise web.HTTPUnauthorized(headers={"WWW-Authenticate": "Bearer"})
+
+def _query_scope(query, default_since=0):
+    """Parse guild, since and until query parameters into (guild_id or None, [start_ms, end_ms])"""
+    try:
+        guild_id = int(query["guild"]) if "guild" in query else None
+        bounds = []
+        for key, default in (("since", default_since), ("until", MAX_EPOCH_MS)):
+            value = query.get(key)
+            if value is None:
+                bounds.append(default)
+            elif value.isdigit():
+                bounds.append(int(value))
+            else:
+                bounds.append(to_epoch_ms(_parse_time_point(value, end=key == "until")))
+    except ValueError:
+        raise web.HTTPBadRequest(text="guild must be an id; since/until must be epoch ms, an ISO date or a duration like 7d")
+    return guild_id, bounds
+
+async def export_endpoint(request):
+    """Stream the punishment log as NDJSON or CSV.
+
+    Query parameters: guild, since, until (epoch ms, ISO date or `7d`), action,
+    format (ndjson|csv) and gzip=1. Requires `Authorization: Bearer <EXPORT_TOKEN>`.
+    """
+    _require_token(request)
+    query = request.query
+    fmt = query.get("format", "ndjson").lower()
+    if fmt not in ("ndjson", "csv"):
+        raise web.HTTPBadRequest(text="format must be ndjson or csv")
+    guild_id, bounds = _query_scope(query)
+
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson",
+        "Content-Disposition": f'attachment; filename="punishments.{fmt}"',
+    })
+    response.enable_chunked_encoding()
+    if query.get("gzip") == "1":
+        response.enable_compression(web.ContentCoding.gzip)
+    else:
+        response.enable_compression()
+    await response.prepare(request)
+
+    first = True
+    async for rows in iter_punishments(guild_id, bounds[0], bounds[1], query.get("action"), EXPORT_BATCH_SIZE):
+        await response.write(_export_chunk(rows, fmt, header=first))
+        first = False
+    if first and fmt == "csv":
+        await response.write(_export_chunk([], fmt, header=True))
+    await response.write_eof()
+    return response
+
+async def stats_endpoint(request):
+    """Moderation statistics for one guild from the daily rollups.
+
+    Query parameters: guild (required), since and until (epoch ms, ISO date
+    or `7d`; default the last 7 days). Requires the export bearer token.
+    """
+    _require_token(request)
+    guild_id, bounds = _query_scope(request.query, default_since=to_epoch_ms(utcnow() - timedelta(days=7)))
+    if guild_id is None:
+        raise web.HTTPBadRequest(text="guild is required")
+    stats = summarize_court_stats(await fetch_court_stats(guild_id, *bounds))
+    for entry in stats["moderators"]:
+        entry["moderator_id"] = str(entry["moderator_id"])
+    return web.json_response({"guild_id": str(guild_id), "since": bounds[0],
+                              "until": None if bounds[1] == MAX_EPOCH_MS else bounds[1], **stats})
+
+async def metrics_endpoint(request):
+    """Prometheus scrape endpoint"""
+    latency = bot.latency
+    gauges = [
+        ("royal_gateway_latency_seconds", "Discord gateway heartbeat latency.", "NaN" if math.isnan(latency) else latency),
+        ("royal_journal_depth", "Punishment records waiting for the next group commit.", journal.depth),
+        ("royal_journal_last_flush_seconds", "Duration of the latest journal flush.", journal.last_flush_ms / 1000),
+        ("royal_loop_lag_p99_seconds", "99th percentile event loop lag over the rolling window.", watchdog.percentiles()["p99"] / 1000),
+        ("royal_loop_stalls", "Times the event loop was held past the lag threshold.", watchdog.stalls),
+        ("royal_automod_tripped", "Members put in the stocks by automod.", automod.tripped),
+        ("royal_raids", "Join raids detected.", raid_guard.raids),
+    ]
+    return web.Response(text=metrics.render(gauges),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
 def create_web_app():
     """Create web application for Render"""
     app = web.Application()
     app.router.add_get('/', health_check)
     app.router.add_get('/ping', ping_endpoint)
     app.router.add_get('/status', status_endpoint)
+    app.router.add_get('/export', export_endpoint)
+    app.router.add_get('/stats', stats_endpoint)
+    app.router.add_get('/metrics', metrics_endpoint)
     return app
 
 # ---------- ROYAL COMMANDS ----------
@@ -222,9 +2220,11 @@ def create_web_app():
 async def _help(ctx):
     """Display royal commands"""
     cmds = {
-        "purge": "Cleanse the hall of messages (1-100)",
-        "banish": "Exile a soul forever from the realm",
+        "purge": "Cleanse the hall of messages (1-10000, filter by user/match/attachments/bots/since)",
+        "banish": "Exile a soul from the realm, forever or for a span (7d)",
         "castout": "Cast a peasant from the castle gates",
+        "massbanish": "Exile many souls at once (mentions, IDs or an ID file)",
+        "masscastout": "Cast many peasants from the gates at once",
         "pillory": "Bind a wretch in public stocks",
         "stocks": "Mute a tongue with royal locks",
         "pardon": "Grant royal mercy to a soul",
@@ -233,7 +2233,9 @@ async def _help(ctx):
         "decree": "Proclaim a royal decree to a channel",
         "setpillory": "Set the pillory announcement hall",
         "setdecree": "Set the royal decree proclamation hall",
-        "courtlog": "View all recent judgments in the realm"
+        "courtlog": "View all recent judgments in the realm",
+        "search": "Search judgment reasons for words, \"phrases\" or links",
+        "courtstats": "Tally the court's judgments by kind, magistrate and day"
     }
 
     embed = medieval_embed(
@@ -252,21 +2254,101 @@ async def _help(ctx):
     )
 
     embed.set_footer(text=f"Royal Court of {ctx.guild.name}")
-    await ctx.send(embed=embed)
+    herald.post(ctx, embed=embed)
 
 # ---------- PURGE COMMAND ----------
+PURGE_MAX = 10000
+BULK_DELETE_AGE = timedelta(days=14) - timedelta(minutes=5)  # stay clear of Discord's hard cutoff
+SINGLE_DELETE_PACE = 1.1  # seconds between deletes of old messages; their bucket is ~5 per 5s
+PURGE_PROGRESS_INTERVAL = 3.0
+
+class PurgeFilters(commands.FlagConverter, case_insensitive=True):
+    """Optional purge filters, e.g. `user: @knave match: free nitro attachments: yes bots: yes since: 2h`"""
+    user: discord.User = None
+    match: str = None
+    attachments: bool = False
+    bots: bool = False
+    since: str = None
+
+async def sweep_channel(channel, limit, check, after=None, before=None, on_progress=None):
+    """Walk up to `limit` messages newest-first and delete those passing `check`.
+
+    The walk starts below `before` (when given) and stops at the first message
+    no newer than `after`, so a `since:` purge never pages through older history.
+
+    Messages younger than a fortnight go out in 100-message bulk deletes; older
+    ones can only be deleted one by one, so those are paced to stay inside the
+    per-route bucket. Returns the number of messages deleted.
+    """
+    cutoff = utcnow() - BULK_DELETE_AGE
+    batch, deleted, scanned = [], 0, 0
+    last_report = time.monotonic()
+
+    async def flush_batch():
+        nonlocal batch, deleted
+        if batch:
+            with metrics.discord_api["purge"].time():
+                await channel.delete_messages(batch)
+            deleted += len(batch)
+            batch = []
+
+    async for message in channel.history(limit=limit, before=before, oldest_first=False):
+        if after is not None and message.created_at <= after:
+            break
+        scanned += 1
+        if check(message):
+            if message.created_at > cutoff:
+                batch.append(message)
+                if len(batch) == 100:
+                    await flush_batch()
+            else:
+                await flush_batch()
+                try:
+                    with metrics.discord_api["purge"].time():
+                        await message.delete()
+                    deleted += 1
+                except discord.NotFound:
+                    pass
+                await asyncio.sleep(SINGLE_DELETE_PACE)
+        if on_progress and time.monotonic() - last_report >= PURGE_PROGRESS_INTERVAL:
+            last_report = time.monotonic()
+            await on_progress(scanned, deleted + len(batch))
+    await flush_batch()
+    return deleted
+
 @bot.command(aliases=['cleanse', 'sweep'])
 @commands.has_permissions(manage_messages=True)
 @commands.guild_only()
-async def purge(ctx, amount: int = 10):
-    """Cleanse the hall of messages"""
-    if amount < 1 or amount > 100:
-        embed = medieval_response("Thou mayest cleanse between 1 and 100 messages only, m'lord!", success=False)
-        return await ctx.send(embed=embed)
+@commands.max_concurrency(1, commands.BucketType.channel)
+async def purge(ctx, amount: int = 10, *, filters: PurgeFilters = None):
+    """Cleanse the hall of messages, optionally filtered by user, match, attachments, bots or since"""
+    if amount < 1 or amount > PURGE_MAX:
+        embed = medieval_response(f"Thou mayest cleanse between 1 and {PURGE_MAX} messages only, m'lord!", success=False)
+        return herald.post(ctx, embed=embed)
 
     if not ctx.guild.me.guild_permissions.manage_messages:
         embed = medieval_response("The Crown lacketh power to cleanse messages in this hall!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
+
+    after, pattern = None, None
+    if filters:
+        try:
+            after = _parse_time_point(filters.since) if filters.since else None
+            pattern = re.compile(filters.match[:200], re.IGNORECASE) if filters.match else None
+        except (ValueError, re.error):
+            embed = medieval_response("Thy filters are garbled! Use `since: 2h` and a sound `match:` pattern.", success=False)
+            return herald.post(ctx, embed=embed)
+
+    def check(message):
+        if filters is None:
+            return True
+        if filters.user and message.author.id != filters.user.id:
+            return False
+        if filters.bots and not message.author.bot:
+            return False
+        if filters.attachments and not message.attachments:
+            return False
+        return pattern is None or pattern.search(message.content) is not None
 
     try:
         try:
@@ -274,53 +2356,80 @@ async def purge(ctx, amount: int = 10):
         except:
             pass
 
-        deleted = await ctx.channel.purge(limit=amount)
-
-        if len(deleted) == 0:
-            embed = medieval_response("No messages could be cleansed! They may be older than a fortnight.", success=False)
-            return await ctx.send(embed=embed, delete_after=5)
-
-        log_action(ctx.author.id, ctx.author.id, "purge", f"Cleansed {len(deleted)} messages")
+        if filters is None and amount <= 100:
+            with metrics.discord_api["purge"].time():
+                count = len(await ctx.channel.purge(limit=amount))
+        else:
+            progress_msg = await ctx.send(embed=medieval_embed(description="🧹  The royal broom begins its sweep...", color_name="grey"))
+
+            async def report(scanned, so_far):
+                embed = medieval_embed(description=f"🧹  Sweeping... **{scanned}** scrolls inspected, **{so_far}** consigned to the flames.", color_name="grey")
+                try:
+                    await progress_msg.edit(embed=embed)
+                except discord.HTTPException:
+                    pass
+
+            try:
+                # Start below our own progress message so the sweep never deletes it
+                count = await sweep_channel(ctx.channel, amount, check, after=after, before=progress_msg, on_progress=report)
+            finally:
+                try:
+                    await progress_msg.delete()
+                except discord.HTTPException:
+                    pass
+
+        if count == 0:
+            embed = medieval_response("No messages could be cleansed! None matched, or the hall was already clean.", success=False)
+            return herald.post(ctx, PRIORITY_NOTICE, coalesce="purge", embed=embed, delete_after=5)
+
+        await log_action(ctx.guild.id, ctx.author, ctx.author, "purge", f"Cleansed {count} messages")
 
         purge_messages = [
-            f"**{len(deleted)}** messages swept away like autumn leaves!",
-            f"**{len(deleted)}** scrolls consigned to the flames!",
-            f"**{len(deleted)}** whispers silenced by royal decree!",
-            f"**{len(deleted)}** parchments torn and discarded!",
-            f"The royal broom hath swept clean! **{len(deleted)}** messages removed!",
+            f"**{count}** messages swept away like autumn leaves!",
+            f"**{count}** scrolls consigned to the flames!",
+            f"**{count}** whispers silenced by royal decree!",
+            f"**{count}** parchments torn and discarded!",
+            f"The royal broom hath swept clean! **{count}** messages removed!",
         ]
 
         embed = medieval_embed(
             description=f"🧹  {random.choice(purge_messages)}\n\n*By order of {ctx.author.mention}*",
             color_name="grey"
         )
-        await ctx.send(embed=embed, delete_after=5)
+        herald.post(ctx, PRIORITY_NOTICE, coalesce="purge", embed=embed, delete_after=5)
 
     except discord.Forbidden:
         embed = medieval_response("The royal seal hath no power to cleanse here!", success=False)
-        await ctx.send(embed=embed, delete_after=5)
+        herald.post(ctx, PRIORITY_NOTICE, coalesce="purge", embed=embed, delete_after=5)
     except discord.HTTPException:
         embed = medieval_response("Messages older than a fortnight cannot be cleansed!", success=False)
-        await ctx.send(embed=embed, delete_after=5)
+        herald.post(ctx, PRIORITY_NOTICE, coalesce="purge", embed=embed, delete_after=5)
 
 # ---------- BANISH COMMAND ----------
 @bot.command(aliases=['exile', 'ostracize'])
 @commands.has_permissions(ban_members=True)
 @commands.guild_only()
-async def banish(ctx, member: discord.Member, *, reason: str = "By royal decree"):
-    """Exile a soul forever from the realm"""
+async def banish(ctx, member: CachedMember, duration: Optional[Duration] = None, *, reason: str = "By royal decree"):
+    """Exile a soul from the realm, forever or for a span such as 7d"""
     if not ctx.guild.me.guild_permissions.ban_members:
         embed = medieval_response("The Crown's herald lacketh the seal to banish souls from the realm!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     ok, msg = can_act_on(member, ctx)
     if not ok:
         embed = medieval_response(msg, success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     try:
-        await member.ban(reason=f"{ctx.author}: {reason}", delete_message_days=0)
-        log_action(member.id, ctx.author.id, "banish", reason)
+        with metrics.discord_api["ban"].time():
+            await member.ban(reason=f"{ctx.author}: {reason}", delete_message_days=0)
+        await log_action(ctx.guild.id, member, ctx.author, "banish", f"{duration}: {reason}" if duration else reason)
+        if duration:
+            until = utcnow() + duration
+            try:
+                await sentences.add(ctx.guild.id, member.id, "unban", until, until, reason)
+            except sqlite3.Error as e:
+                logger.error(f"❌ Failed to schedule unban for {member.id}: {e}")
 
         banish_messages = [
             f"**{member.display_name}** hath been banished beyond the realm's borders forever!",
@@ -334,30 +2443,33 @@ async def banish(ctx, member: discord.Member, *, reason: str = "By royal decree"
             description=f"{random.choice(banish_messages)}\n\n**Crime:** {reason}\n**Judge:** {ctx.author.mention}",
             color_name="red"
         )
+        if duration:
+            embed.add_field(name="⏳ Exile endeth", value=f"<t:{int(until.timestamp())}:R>", inline=False)
         embed.set_footer(text="Let this be a warning to all who would defy the Crown")
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
     except discord.Forbidden:
         embed = medieval_response("The gate guards refuse the writ of banishment!", success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
 
 # ---------- CASTOUT COMMAND ----------
 @bot.command(aliases=['expel', 'eject'])
 @commands.has_permissions(kick_members=True)
 @commands.guild_only()
-async def castout(ctx, member: discord.Member, *, reason: str = "Unfit for the court"):
+async def castout(ctx, member: CachedMember, *, reason: str = "Unfit for the court"):
     """Cast a peasant from the castle gates"""
     if not ctx.guild.me.guild_permissions.kick_members:
         embed = medieval_response("The Crown lacketh the authority to cast out subjects!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     ok, msg = can_act_on(member, ctx)
     if not ok:
         embed = medieval_response(msg, success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     try:
-        await member.kick(reason=f"{ctx.author}: {reason}")
-        log_action(member.id, ctx.author.id, "castout", reason)
+        with metrics.discord_api["kick"].time():
+            await member.kick(reason=f"{ctx.author}: {reason}")
+        await log_action(ctx.guild.id, member, ctx.author, "castout", reason)
 
         kick_messages = [
             f"**{member.display_name}** hath been cast out beyond the castle gates!",
@@ -372,29 +2484,115 @@ async def castout(ctx, member: discord.Member, *, reason: str = "Unfit for the c
             color_name="orange"
         )
         embed.set_footer(text="May they learn humility beyond our walls")
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
     except discord.Forbidden:
         embed = medieval_response("The guards at the gate refuse to open them!", success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
+
+# ---------- MASS JUDGMENT COMMANDS ----------
+MASS_ACTION_MAX = 1000
+MASS_ACTION_FILE_LIMIT = 1_000_000
+TARGET_PATTERN = re.compile(r"<@!?(\d{15,20})>|\b(\d{15,20})\b")
+
+async def gather_targets(ctx, text):
+    """Collect unique ids from mentions, raw ids and attached text files; the rest of the text is the reason"""
+    sources = [text]
+    for attachment in ctx.message.attachments:
+        if attachment.size <= MASS_ACTION_FILE_LIMIT:
+            sources.append((await attachment.read()).decode("utf-8", "ignore"))
+    ids = [int(a or b) for source in sources for a, b in TARGET_PATTERN.findall(source)]
+    reason = " ".join(TARGET_PATTERN.sub("", text).split())
+    return list(dict.fromkeys(ids)), reason
+
+async def mass_judgment(ctx, text, action, default_reason):
+    """Shared body of massbanish and masscastout"""
+    ids, reason = await gather_targets(ctx, text)
+    reason = reason or default_reason
+    if not ids:
+        embed = medieval_response("Name the souls to judge by mention, by ID, or in an attached scroll, m'lord!", success=False)
+        return herald.post(ctx, embed=embed)
+    if len(ids) > MASS_ACTION_MAX:
+        embed = medieval_response(f"No more than {MASS_ACTION_MAX} souls may be judged at once!", success=False)
+        return herald.post(ctx, embed=embed)
+
+    members = await fetch_members_bulk(ctx.guild, ids)
+    judged, spared = [], []
+    for user_id in ids:
+        member = members.get(user_id)
+        if member is not None:
+            ok, msg = can_act_on(member, ctx)
+            if ok:
+                judged.append(member)
+            else:
+                spared.append((user_id, msg))
+        elif action == "castout":
+            spared.append((user_id, "Not within the castle walls."))
+        elif user_id in (ctx.guild.owner_id, ctx.guild.me.id):
+            spared.append((user_id, "The Crown and its agent are beyond judgment."))
+        else:
+            # Not a member (already fled): a ban by ID still bars the gates
+            judged.append(discord.Object(id=user_id))
+
+    done, failed = await dispatch_judgments(ctx.guild, judged, action, f"{ctx.author}: {reason}")
+    if done:
+        await log_actions(ctx.guild.id, [(target, ctx.author, action, reason) for target in done])
+
+    title = "🏴  MASS BANISHMENT" if action == "banish" else "🚪  MASS CASTING OUT"
+    verb = "banished" if action == "banish" else "cast out"
+    embed = medieval_embed(
+        title=title,
+        description=f"**{len(done)}** of **{len(ids)}** souls {verb}!\n\n**Crime:** {reason}\n**Judge:** {ctx.author.mention}",
+        color_name="red" if action == "banish" else "orange"
+    )
+    for label, entries in (("🛡️ Spared", spared), ("💥 Failed", failed)):
+        if entries:
+            lines = [f"`{user_id}` — {why}" for user_id, why in entries[:10]]
+            if len(entries) > 10:
+                lines.append(f"...and {len(entries) - 10} more")
+            embed.add_field(name=f"{label} ({len(entries)})", value="\n".join(lines)[:1024], inline=False)
+    embed.set_footer(text="Let this be a warning to all who would defy the Crown")
+    herald.post(ctx, embed=embed)
+
+@bot.command(aliases=['massexile'])
+@commands.has_permissions(ban_members=True)
+@commands.guild_only()
+@commands.max_concurrency(1, commands.BucketType.guild)
+async def massbanish(ctx, *, targets: str = ""):
+    """Exile many souls at once by mention, ID or attached ID scroll"""
+    if not ctx.guild.me.guild_permissions.ban_members:
+        embed = medieval_response("The Crown's herald lacketh the seal to banish souls from the realm!", success=False)
+        return herald.post(ctx, embed=embed)
+    await mass_judgment(ctx, targets, "banish", "By royal decree")
+
+@bot.command(aliases=['massexpel'])
+@commands.has_permissions(kick_members=True)
+@commands.guild_only()
+@commands.max_concurrency(1, commands.BucketType.guild)
+async def masscastout(ctx, *, targets: str = ""):
+    """Cast many peasants from the gates by mention, ID or attached ID scroll"""
+    if not ctx.guild.me.guild_permissions.kick_members:
+        embed = medieval_response("The Crown lacketh the authority to cast out subjects!", success=False)
+        return herald.post(ctx, embed=embed)
+    await mass_judgment(ctx, targets, "castout", "Unfit for the court")
 
 # ---------- PILLORY COMMAND ----------
 @bot.command(aliases=['shame', 'humiliate'])
 @commands.has_permissions(moderate_members=True)
 @commands.guild_only()
-async def pillory(ctx, member: discord.Member, minutes: int, *, reason: str = "Crimes against the Crown"):
+async def pillory(ctx, member: CachedMember, minutes: int, *, reason: str = "Crimes against the Crown"):
     """Bind a wretch in public stocks"""
-    if minutes <= 0 or minutes > 40320:
-        embed = medieval_response("Sentence must be between 1 minute and 4 weeks (40320 minutes), m'lord!", success=False)
-        return await ctx.send(embed=embed)
+    if minutes <= 0 or minutes > SENTENCE_MAX_MINUTES:
+        embed = medieval_response(f"Sentence must be between 1 minute and a year ({SENTENCE_MAX_MINUTES} minutes), m'lord!", success=False)
+        return herald.post(ctx, embed=embed)
 
     if not ctx.guild.me.guild_permissions.moderate_members:
         embed = medieval_response("The Crown lacketh the chains to bind offenders!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     ok, msg = can_act_on(member, ctx)
     if not ok:
         embed = medieval_response(msg, success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     until = utcnow() + timedelta(minutes=minutes)
 
@@ -409,15 +2607,15 @@ async def pillory(ctx, member: discord.Member, minutes: int, *, reason: str = "C
         time_desc = f"**{days}** day{'s' if days != 1 else ''}"
 
     try:
-        await member.timeout(until, reason=f"{ctx.author}: {reason}")
+        await bind_member(member, until, f"{ctx.author}: {reason}")
     except discord.Forbidden:
         embed = medieval_response("The sheriff refuseth to apply the stocks!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
     except discord.HTTPException:
         embed = medieval_response("The stocks' lock did break! Try anon, good sir!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
-    log_action(member.id, ctx.author.id, "pillory", f"{minutes} minutes: {reason}")
+    await log_action(ctx.guild.id, member, ctx.author, "pillory", f"{minutes} minutes: {reason}")
 
     # Public shaming in pillory channel
     chan_id = get_pillory_channel(ctx.guild.id)
@@ -429,7 +2627,7 @@ async def pillory(ctx, member: discord.Member, minutes: int, *, reason: str = "C
                 f"**Gather round!** {member.display_name} is bound for {time_desc}!\n**Offense:** *{reason}*\nPelt them with rotten vegetables!",
                 f"**Attention all!** {member.display_name} faces public shame for {time_desc}!\n**Transgression:** *{reason}*\nLet laughter be their punishment!",
             ]
-            await chan.send(random.choice(shame_messages))
+            herald.post(chan, PRIORITY_FLAVOUR, content=random.choice(shame_messages))
 
     pillory_messages = [
         f"**{member.display_name}** hath been bound in the pillory for {time_desc}!",
@@ -443,26 +2641,28 @@ async def pillory(ctx, member: discord.Member, minutes: int, *, reason: str = "C
         color_name="dark_gold"
     )
     embed.set_footer(text="Public shame is a powerful teacher")
-    await ctx.send(embed=embed)
+    herald.post(ctx, embed=embed)
 
 # ---------- STOCKS COMMAND ----------
 @bot.command(aliases=['silence', 'mute'])
 @commands.has_permissions(moderate_members=True)
 @commands.guild_only()
-async def stocks(ctx, member: discord.Member, minutes: int, *, reason: str = "Bound by royal order"):
-    """Mute a tongue with royal locks"""
-    if minutes <= 0 or minutes > 40320:
-        embed = medieval_response("Sentence must be 1-40320 minutes, noble sir!", success=False)
-        return await ctx.send(embed=embed)
+async def stocks(ctx, member: CachedMember, minutes: Optional[int] = None, *, reason: str = "Bound by royal order"):
+    """Mute a tongue with royal locks; without minutes the sentence groweth with the soul's offense score"""
+    if minutes is None:
+        minutes = stocks_minutes(await offense_score(ctx.guild.id, member.id))
+    if minutes <= 0 or minutes > SENTENCE_MAX_MINUTES:
+        embed = medieval_response(f"Sentence must be 1-{SENTENCE_MAX_MINUTES} minutes, noble sir!", success=False)
+        return herald.post(ctx, embed=embed)
 
     if not ctx.guild.me.guild_permissions.moderate_members:
         embed = medieval_response("The Crown lacketh the manacles to silence tongues!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     ok, msg = can_act_on(member, ctx)
     if not ok:
         embed = medieval_response(msg, success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     until = utcnow() + timedelta(minutes=minutes)
 
@@ -477,8 +2677,8 @@ async def stocks(ctx, member: discord.Member, minutes: int, *, reason: str = "Bo
         time_desc = f"**{days}** day{'s' if days != 1 else ''}"
 
     try:
-        await member.timeout(until, reason=f"{ctx.author}: {reason}")
-        log_action(member.id, ctx.author.id, "stocks", f"{minutes} minutes: {reason}")
+        await bind_member(member, until, f"{ctx.author}: {reason}")
+        await log_action(ctx.guild.id, member, ctx.author, "stocks", f"{minutes} minutes: {reason}")
 
         stocks_messages = [
             f"**{member.display_name}** is locked in the stocks for {time_desc}!",
@@ -492,32 +2692,37 @@ async def stocks(ctx, member: discord.Member, minutes: int, *, reason: str = "Bo
             color_name="orange"
         )
         embed.set_footer(text="Silence breeds contemplation")
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
     except discord.Forbidden:
         embed = medieval_response("The sheriff refuseth to apply the lock!", success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
     except discord.HTTPException:
         embed = medieval_response("The stocks did splinter! Try anon, m'lord!", success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
 
 # ---------- PARDON COMMAND ----------
 @bot.command(aliases=['forgive', 'mercy'])
 @commands.has_permissions(moderate_members=True)
 @commands.guild_only()
-async def pardon(ctx, member: discord.Member):
+async def pardon(ctx, member: CachedMember):
     """Grant royal mercy to a soul"""
     if not ctx.guild.me.guild_permissions.moderate_members:
         embed = medieval_response("The Crown lacketh the key to grant pardons!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     ok, msg = can_act_on(member, ctx)
     if not ok:
         embed = medieval_response(msg, success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     try:
-        await member.timeout(None, reason=f"Pardoned by {ctx.author}")
-        log_action(member.id, ctx.author.id, "pardon", "Royal mercy granted")
+        with metrics.discord_api["timeout"].time():
+            await member.timeout(None, reason=f"Pardoned by {ctx.author}")
+        try:
+            await sentences.cancel(ctx.guild.id, member.id, "retimeout")
+        except sqlite3.Error as e:
+            logger.error(f"❌ Failed to cancel sentence for {member.id}: {e}")
+        await log_action(ctx.guild.id, member, ctx.author, "pardon", "Royal mercy granted")
 
         pardon_messages = [
             f"**{member.display_name}** hath been pardoned by the Crown!",
@@ -532,21 +2737,21 @@ async def pardon(ctx, member: discord.Member):
             color_name="green"
         )
         embed.set_footer(text="Mercy is the mark of a true monarch")
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
     except discord.Forbidden:
         embed = medieval_response("The sheriff refuseth to turn the key!", success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
     except discord.HTTPException:
         embed = medieval_response("The pardon scroll did tear! Try anon, good sir!", success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
 
 # ---------- SUMMON COMMAND ----------
 @bot.command(aliases=['call', 'subpoena'])
 @commands.has_permissions(administrator=True)
 @commands.guild_only()
-async def summon(ctx, member: discord.Member, *, reason: str = "Summoned before the Crown"):
+async def summon(ctx, member: CachedMember, *, reason: str = "Summoned before the Crown"):
     """Issue a royal summons to court"""
-    log_action(member.id, ctx.author.id, "summon", reason)
+    await log_action(ctx.guild.id, member, ctx.author, "summon", reason)
 
     summon_messages = [
         f"**{member.mention}** hath been summoned before the Crown!",
@@ -561,28 +2766,29 @@ async def summon(ctx, member: discord.Member, *, reason: str = "Summoned before
         color_name="gold"
     )
     embed.set_footer(text="Heed the call or face the consequences")
-    await ctx.send(embed=embed)
+    herald.post(ctx, embed=embed)
 
 # ---------- CHRONICLE COMMAND ----------
-@bot.command(aliases=['record', 'dossier'])
-@commands.has_permissions(administrator=True)
-@commands.guild_only()
-async def chronicle(ctx, member: discord.Member):
-    """Read the criminal records of a soul"""
-    rows = fetch_history(member.id)
-    if not rows:
-        embed = medieval_response(f"{member.display_name} beareth no recorded misdeeds. A soul of pure virtue!", success=True)
-        return await ctx.send(embed=embed)
+CHRONICLE_PAGE_SIZE = 10
 
+def chronicle_embed(member, rows, total, page, period=None, score=0.0):
+    """Render one page of a chronicle; rows are (id, action, reason, ts) newest first"""
+    span = f" {period.describe()}" if period else ""
     embed = medieval_embed(
         title=f"📜  Chronicle of {member.display_name}",
-        description=f"**Recorded Transgressions:** {len(rows)}\n*Most recent judgments first:*",
+        description=f"**Recorded Transgressions{span}:** {total}\n*Most recent judgments first:*",
         color_name="dark_gold"
     )
 
-    for action, reason, ts in rows[:10]:
-        dt_obj = dt.fromisoformat(ts).replace(tzinfo=timezone.utc)
-        time_ago = utcnow() - dt_obj
+    action_descriptions = {
+        "banish": "Banished from realm", "castout": "Cast from gates", "pillory": "Public pillory",
+        "stocks": "Silenced in stocks", "pardon": "Royal pardon", "summon": "Royal summons",
+        "purge": "Hall cleansed", "decree": "Royal decree"
+    }
+    now = utcnow()
+
+    for _, action, reason, ts in rows:
+        time_ago = now - from_epoch_ms(ts)
 
         if time_ago.days > 0:
             time_str = f"{time_ago.days} day{'s' if time_ago.days != 1 else ''} ago"
@@ -593,63 +2799,135 @@ async def chronicle(ctx, member: discord.Member):
             minutes = time_ago.seconds // 60
             time_str = f"{minutes} minute{'s' if minutes != 1 else ''} ago"
 
-        action_icons = {"banish": "🏴", "castout": "🚪", "pillory": "🪓", "stocks": "🔒", "pardon": "🕊️", "summon": "📯", "purge": "🧹", "decree": "📜"}
-        icon = action_icons.get(action, "⚖️")
-
-        action_descriptions = {
-            "banish": "Banished from realm", "castout": "Cast from gates", "pillory": "Public pillory",
-            "stocks": "Silenced in stocks", "pardon": "Royal pardon", "summon": "Royal summons",
-            "purge": "Hall cleansed", "decree": "Royal decree"
-        }
+        icon = ACTION_ICONS.get(action, "⚖️")
         action_desc = action_descriptions.get(action, action)
-
         embed.add_field(name=f"{icon} {action_desc} • {time_str}", value=f"**Judgment:** {reason}", inline=False)
 
-    if len(rows) > 10:
-        embed.set_footer(text=f"And {len(rows) - 10} more judgment{'s' if len(rows) - 10 != 1 else ''}...")
+    severity = "A troublesome soul indeed!" if score >= OFFENSE_TROUBLESOME else "Minor infractions only."
+    severity += f" • Offense score {score:.1f}"
+    pages = -(-total // CHRONICLE_PAGE_SIZE)
+    if pages > 1:
+        embed.set_footer(text=f"Page {page + 1} of {pages} • {severity}")
     else:
-        severity = "A troublesome soul indeed!" if len(rows) > 5 else "Minor infractions only."
         embed.set_footer(text=severity)
+    return embed
 
-    await ctx.send(embed=embed)
+class ChronicleView(discord.ui.View):
+    """Page buttons for a chronicle; each press fetches exactly one page via a keyset cursor"""
+
+    def __init__(self, ctx, member, period, total, rows, score):
+        super().__init__(timeout=180)
+        self.ctx = ctx
+        self.member = member
+        self.period = period
+        self.total = total
+        self.rows = rows
+        self.score = score
+        self.page = 0
+        self.message = None
+        self._sync_buttons()
+
+    def _sync_buttons(self):
+        self.newer.disabled = self.page == 0
+        self.older.disabled = (self.page + 1) * CHRONICLE_PAGE_SIZE >= self.total
+
+    async def _turn(self, interaction, **cursor):
+        rows = await fetch_history(self.ctx.guild.id, self.member.id, *self._bounds(), **cursor)
+        if rows:
+            self.rows = rows
+            self.page += 1 if "before" in cursor else -1
+        self._sync_buttons()
+        embed = chronicle_embed(self.member, self.rows, self.total, self.page, self.period, self.score)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    def _bounds(self):
+        if self.period:
+            return self.period.start_ms, self.period.end_ms
+        return 0, MAX_EPOCH_MS
+
+    @discord.ui.button(label="◀ Newer", style=discord.ButtonStyle.secondary)
+    async def newer(self, interaction, button):
+        first = self.rows[0]
+        await self._turn(interaction, after=(first[3], first[0]))
+
+    @discord.ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction, button):
+        last = self.rows[-1]
+        await self._turn(interaction, before=(last[3], last[0]))
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.ctx.author.id:
+            await interaction.response.send_message("Only the lord who opened this chronicle may turn its pages.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+@bot.command(aliases=['record', 'dossier'])
+@commands.has_permissions(administrator=True)
+@commands.guild_only()
+async def chronicle(ctx, member: CachedMember, *, period: TimeRange = None):
+    """Read the criminal records of a soul, optionally `since 7d` or `between <date> <date>`"""
+    bounds = (period.start_ms, period.end_ms) if period else (0, MAX_EPOCH_MS)
+    total = await count_history(ctx.guild.id, member.id, *bounds)
+    rows = await fetch_history(ctx.guild.id, member.id, *bounds) if total else []
+    if not rows:
+        embed = medieval_response(f"{member.display_name} beareth no recorded misdeeds. A soul of pure virtue!", success=True)
+        return herald.post(ctx, embed=embed)
+
+    score = await offense_score(ctx.guild.id, member.id)
+    embed = chronicle_embed(member, rows, total, 0, period, score)
+    if total <= CHRONICLE_PAGE_SIZE:
+        return herald.post(ctx, embed=embed)
+
+    view = ChronicleView(ctx, member, period, total, rows, score)
+    view.message = await herald.post(ctx, embed=embed, view=view)
 
 # ---------- COURTLOG COMMAND ----------
 @bot.command(aliases=['judgments', 'recent'])
 @commands.has_permissions(administrator=True)
 @commands.guild_only()
-async def courtlog(ctx, limit: int = 10):
-    """View all recent judgments in the realm"""
+async def courtlog(ctx, limit: Optional[int] = 10, *, period: TimeRange = None):
+    """View all recent judgments in the realm, optionally `since 7d` or `between <date> <date>`"""
     if limit < 1 or limit > 25:
         embed = medieval_response("Thou mayest view between 1 and 25 recent judgments!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     try:
-        with sqlite3.connect(DB_NAME) as db:
-            rows = db.execute(
-                "SELECT user_id, moderator_id, action, reason, timestamp FROM punishments ORDER BY timestamp DESC LIMIT ?",
-                (limit,)).fetchall()
+        if period:
+            rows = await fetch_court_log(ctx.guild.id, limit, period.start_ms, period.end_ms)
+        else:
+            rows = await fetch_court_log(ctx.guild.id, limit)
     except sqlite3.Error as e:
         logger.error(f"❌ Failed to fetch court log: {e}")
         embed = medieval_response("The royal chronicles are sealed! The scribes have failed us!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     if not rows:
         embed = medieval_response("No judgments have been recorded in the royal chronicles!", success=True)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
-    embed = medieval_embed(title="⚖️  Recent Royal Judgments", description=f"**Last {len(rows)} judgments in the realm:**", color_name="blue")
+    span = f" {period.describe()}" if period else ""
+    embed = medieval_embed(title="⚖️  Recent Royal Judgments", description=f"**Last {len(rows)} judgments in the realm{span}:**", color_name="blue")
 
-    for user_id, mod_id, action, reason, ts in rows:
-        member = ctx.guild.get_member(user_id)
-        moderator = ctx.guild.get_member(mod_id)
-        member_name = member.display_name if member else f"Unknown ({user_id})"
-        mod_name = moderator.display_name if moderator else f"Unknown ({mod_id})"
+    # Older rows predate name snapshots; look those ids up together rather than one by one
+    unnamed = {uid for row in rows for uid, name in ((row[0], row[5]), (row[1], row[6])) if not name}
+    resolved = await user_names.resolve(ctx.guild, unnamed) if unnamed else {}
 
-        dt_obj = dt.fromisoformat(ts).replace(tzinfo=timezone.utc)
-        time_str = f"<t:{int(dt_obj.timestamp())}:R>"
+    for user_id, mod_id, action, reason, ts, user_name, mod_name in rows:
+        member_name = user_name or resolved.get(user_id) or f"Unknown ({user_id})"
+        mod_name = mod_name or resolved.get(mod_id) or f"Unknown ({mod_id})"
 
-        action_icons = {"banish": "🏴", "castout": "🚪", "pillory": "🪓", "stocks": "🔒", "pardon": "🕊️", "summon": "📯", "purge": "🧹", "decree": "📜"}
-        icon = action_icons.get(action, "⚖️")
+        time_str = f"<t:{ts // 1000}:R>"
+
+        icon = ACTION_ICONS.get(action, "⚖️")
 
         embed.add_field(
             name=f"{icon} {member_name}",
@@ -658,7 +2936,159 @@ async def courtlog(ctx, limit: int = 10):
         )
 
     embed.set_footer(text=f"Royal Court of {ctx.guild.name}")
-    await ctx.send(embed=embed)
+    herald.post(ctx, embed=embed)
+
+# ---------- SEARCH COMMAND ----------
+SEARCH_PAGE_SIZE = 5
+SEARCH_OPTION = re.compile(r"\b(action|sort):\s*(\w+)", re.IGNORECASE)
+SEARCH_ACTIONS = ("banish", "castout", "pillory", "stocks", "pardon", "summon", "purge", "decree")
+
+def search_embed(text, rows, page, names):
+    embed = medieval_embed(title="🔎  Search of the Royal Chronicles", description=f"**Sought:** {text[:200]}", color_name="blue")
+    for _, user_id, mod_id, action, reason, ts, user_name, mod_name in rows:
+        member_name = user_name or names.get(user_id) or f"Unknown ({user_id})"
+        mod_name = mod_name or names.get(mod_id) or f"Unknown ({mod_id})"
+        reason = reason or ""
+        embed.add_field(
+            name=f"{ACTION_ICONS.get(action, '⚖️')} {member_name}",
+            value=f"**Action:** {action.title()}\n**By:** {mod_name}\n**Reason:** {reason[:200]}{'...' if len(reason) > 200 else ''}\n**When:** <t:{ts // 1000}:R>",
+            inline=False
+        )
+    embed.set_footer(text=f"Page {page + 1}")
+    return embed
+
+class SearchView(discord.ui.View):
+    """Page buttons for search results; each page is one FTS query of SEARCH_PAGE_SIZE + 1 hits"""
+
+    def __init__(self, ctx, text, action, newest, rows):
+        super().__init__(timeout=180)
+        self.ctx = ctx
+        self.text = text
+        self.action = action
+        self.newest = newest
+        self.pages = [rows]
+        self.page = 0
+        self.message = None
+        self._sync_buttons()
+
+    def _sync_buttons(self):
+        self.previous.disabled = self.page == 0
+        self.next.disabled = len(self.pages[self.page]) <= SEARCH_PAGE_SIZE
+
+    async def render(self):
+        rows = self.pages[self.page][:SEARCH_PAGE_SIZE]
+        unnamed = {uid for row in rows for uid, name in ((row[1], row[6]), (row[2], row[7])) if not name}
+        names = await user_names.resolve(self.ctx.guild, unnamed) if unnamed else {}
+        return search_embed(self.text, rows, self.page, names)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction, button):
+        self.page -= 1
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction, button):
+        if self.page + 1 == len(self.pages):
+            last = self.pages[self.page][SEARCH_PAGE_SIZE - 1]
+            rows = await search_punishments(
+                self.ctx.guild.id, self.text, self.action, self.newest, limit=SEARCH_PAGE_SIZE + 1,
+                offset=(self.page + 1) * SEARCH_PAGE_SIZE, before_id=last[0] if self.newest else None)
+            if not rows:
+                button.disabled = True
+                return await interaction.response.edit_message(view=self)
+            self.pages.append(rows)
+        self.page += 1
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.ctx.author.id:
+            await interaction.response.send_message("Only the lord who began this search may turn its pages.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+@bot.command(aliases=['seek', 'find'])
+@commands.has_permissions(administrator=True)
+@commands.guild_only()
+async def search(ctx, *, text: str = ""):
+    """Search judgment reasons, e.g. `discord.gg "free nitro" action: banish sort: newest`"""
+    options = {key.lower(): value.lower() for key, value in SEARCH_OPTION.findall(text)}
+    text = " ".join(SEARCH_OPTION.sub("", text).split())
+    action = options.get("action")
+    if action and action not in SEARCH_ACTIONS:
+        embed = medieval_response(f"No such judgment as `{action}`! Choose from: {', '.join(SEARCH_ACTIONS)}.", success=False)
+        return herald.post(ctx, embed=embed)
+    newest = options.get("sort") == "newest"
+
+    try:
+        rows = await search_punishments(ctx.guild.id, text, action, newest, limit=SEARCH_PAGE_SIZE + 1)
+    except sqlite3.Error as e:
+        logger.error(f"❌ Failed to search court log: {e}")
+        embed = medieval_response("The royal chronicles are sealed! The scribes have failed us!", success=False)
+        return herald.post(ctx, embed=embed)
+
+    if rows is None:
+        embed = medieval_response(f"Tell the scribes what to seek, m'lord! `{PREFIX}search <words> [action: banish] [sort: newest]`", success=False)
+        return herald.post(ctx, embed=embed)
+    if not rows:
+        embed = medieval_response("The scribes found no judgment bearing those words.", success=True)
+        return herald.post(ctx, embed=embed)
+
+    view = SearchView(ctx, text, action, newest, rows)
+    embed = await view.render()
+    if len(rows) <= SEARCH_PAGE_SIZE:
+        return herald.post(ctx, embed=embed)
+    view.message = await herald.post(ctx, embed=embed, view=view)
+
+# ---------- COURTSTATS COMMAND ----------
+@bot.command(aliases=['tally', 'ledger'])
+@commands.has_permissions(administrator=True)
+@commands.guild_only()
+async def courtstats(ctx, *, period: TimeRange = None):
+    """Tally the court's judgments by kind, magistrate and day, for the last week or `since`/`between` a period"""
+    start_ms = period.start_ms if period else to_epoch_ms(utcnow() - timedelta(days=7))
+    end_ms = period.end_ms if period else MAX_EPOCH_MS
+    try:
+        stats = summarize_court_stats(await fetch_court_stats(ctx.guild.id, start_ms, end_ms))
+    except sqlite3.Error as e:
+        logger.error(f"❌ Failed to fetch court stats: {e}")
+        embed = medieval_response("The royal ledgers are sealed! The scribes have failed us!", success=False)
+        return herald.post(ctx, embed=embed)
+
+    span = period.describe() if period else "in the past week"
+    if not stats["total"]:
+        embed = medieval_response(f"No judgments were passed {span}. A peaceful realm!", success=True)
+        return herald.post(ctx, embed=embed)
+
+    embed = medieval_embed(title="📊  Ledger of the Royal Court", description=f"**{stats['total']}** judgments {span}", color_name="blue")
+    embed.add_field(
+        name="⚖️ By kind",
+        value="\n".join(f"{ACTION_ICONS.get(action, '⚖️')} {action.title()}: **{count}**" for action, count in stats["actions"].items()),
+        inline=True
+    )
+    embed.add_field(
+        name="🛡️ Most zealous magistrates",
+        value="\n".join(f"<@{entry['moderator_id']}>: **{entry['total']}**" for entry in stats["moderators"][:5]),
+        inline=True
+    )
+    days = stats["days"][-14:]
+    embed.add_field(
+        name="📅 By day" + (" (last 14)" if len(stats["days"]) > 14 else ""),
+        value="\n".join(f"`{day['date']}` {day['total']}" for day in days),
+        inline=False
+    )
+    embed.set_footer(text=f"Whole days in UTC • Royal Court of {ctx.guild.name}")
+    herald.post(ctx, embed=embed)
 
 # ---------- DECREE COMMAND ----------
 @bot.command(aliases=['proclaim', 'announce'])
@@ -679,11 +3109,11 @@ async def decree(ctx, channel: discord.TextChannel = None, *, message: str = "")
                 color_name="orange"
             )
             embed.set_footer(text="Use !setdecree to set a default decree hall")
-            return await ctx.send(embed=embed)
+            return herald.post(ctx, embed=embed)
 
     if not channel.permissions_for(ctx.guild.me).send_messages:
         embed = medieval_response(f"I cannot herald thy decree in {channel.mention}! The heralds are barred!", success=False)
-        return await ctx.send(embed=embed)
+        return herald.post(ctx, embed=embed)
 
     title = random.choice(ROYAL_TITLES)
     signature = random.choice(ROYAL_SIGNATURES)
@@ -726,15 +3156,15 @@ async def decree(ctx, channel: discord.TextChannel = None, *, message: str = "")
         ]
 
         confirmation = medieval_response(random.choice(confirm_messages), success=True)
-        await ctx.send(embed=confirmation, delete_after=5)
-        log_action(ctx.author.id, ctx.author.id, "decree", f"Proclaimed in {channel.name}: {message[:50]}...")
+        herald.post(ctx, PRIORITY_NOTICE, coalesce="decree", embed=confirmation, delete_after=5)
+        await log_action(ctx.guild.id, ctx.author, ctx.author, "decree", f"Proclaimed in {channel.name}: {message[:50]}...")
 
     except discord.Forbidden:
         embed = medieval_response(f"Could not send decree to {channel.mention}. The gates are barred!", success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
     except discord.HTTPException:
         embed = medieval_response("Failed to send the decree. The royal scribe's quill broke!", success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
 
 # ---------- SETPILLORY COMMAND ----------
 @bot.command(aliases=['setshamehall'])
@@ -742,9 +3172,9 @@ async def decree(ctx, channel: discord.TextChannel = None, *, message: str = "")
 @commands.guild_only()
 async def setpillory(ctx, channel: discord.TextChannel):
     """Set the pillory announcement hall"""
-    set_pillory_channel(ctx.guild.id, channel.id)
+    await set_pillory_channel(ctx.guild.id, channel.id)
     embed = medieval_response(f"The pillory yard hath been raised in {channel.mention}. Let all who trespass beware!", success=True)
-    await ctx.send(embed=embed)
+    herald.post(ctx, embed=embed)
 
 # ---------- SETDECREE COMMAND ----------
 @bot.command(aliases=['setannouncehall'])
@@ -752,9 +3182,9 @@ async def setpillory(ctx, channel: discord.TextChannel):
 @commands.guild_only()
 async def setdecree(ctx, channel: discord.TextChannel):
     """Set the royal decree proclamation hall"""
-    set_decree_channel(ctx.guild.id, channel.id)
+    await set_decree_channel(ctx.guild.id, channel.id)
     embed = medieval_response(f"The royal decree hall hath been established in {channel.mention}. All proclamations shall echo there!", success=True)
-    await ctx.send(embed=embed)
+    herald.post(ctx, embed=embed)
 
 # ---------- ON READY ----------
 @bot.event
@@ -762,18 +3192,97 @@ async def on_ready():
     logger.info(f'🏰  Royal Court Bot hath awakened as {bot.user} (ID: {bot.user.id})')
     logger.info('⚖️  Ready to administer royal justice!')
     logger.info('📜  Royal seals prepared and chronicles open!')
-    
-    try:
-        init_db()
-        logger.info("✅ Database initialized successfully")
-    except Exception as e:
-        logger.error(f"❌ Database initialization failed: {e}")
-    
+    status_snapshot.reset(bot.guilds)
+
+    # A cluster worker only sees its own shards' guilds, so it cannot tell a single-guild court
+    if CLUSTER_ID is None and len(bot.guilds) == 1:
+        try:
+            claimed = await db.run(backfill_guild_ids, bot.guilds[0].id)
+            if claimed:
+                logger.info(f"✅ Assigned {claimed} legacy judgments to {bot.guilds[0].name}")
+        except sqlite3.Error as e:
+            logger.error(f"❌ Failed to backfill guild ids: {e}")
+
     logger.info('------')
 
+# ---------- GUILD EVENTS ----------
+@bot.listen("on_guild_join")
+async def count_guild_join(guild):
+    status_snapshot.adjust(guilds=1, users=guild.member_count or 0)
+
+@bot.listen("on_guild_remove")
+async def count_guild_remove(guild):
+    status_snapshot.adjust(guilds=-1, users=-(guild.member_count or 0))
+
+@bot.listen("on_member_join")
+async def count_member_join(member):
+    status_snapshot.adjust(users=1)
+
+# Raw, because the lazy member cache never finds the leaver and discord.py then skips on_member_remove
+@bot.listen("on_raw_member_remove")
+async def count_member_remove(payload):
+    status_snapshot.adjust(users=-1)
+
+# ---------- RAID EVENTS ----------
+@bot.listen("on_member_join")
+async def watch_the_gates(member):
+    if RAID_ACTION != "off":
+        raid_guard.observe(member, time.monotonic())
+
+# ---------- SENTENCE EVENTS ----------
+@bot.listen("on_member_join")
+async def rebind_fugitive(member):
+    """Someone who left mid-sentence is bound again the moment they return"""
+    try:
+        until_ms = await sentences.pending_timeout(member.guild.id, member.id)
+    except sqlite3.Error as e:
+        logger.error(f"❌ Failed to check sentences for {member.id}: {e}")
+        return
+    if until_ms:
+        try:
+            await bind_member(member, from_epoch_ms(until_ms), "Returned before their sentence was served")
+        except discord.HTTPException as e:
+            logger.warning(f"⚠️ Could not rebind returning member {member.id}: {e}")
+
+# ---------- AUTOMOD EVENTS ----------
+@bot.listen("on_message")
+async def automod_watch(message):
+    if not AUTOMOD or message.guild is None or message.author.bot:
+        return
+    breach = automod.check((message.channel.id, message.author.id), message.content,
+                           len(message.mentions) + len(message.raw_role_mentions), time.monotonic())
+    if breach:
+        await automod.sentence(message, breach)
+
+# ---------- MEMBER CACHE EVENTS ----------
+@bot.listen("on_message")
+async def remember_author(message):
+    if isinstance(message.author, discord.Member):
+        recent_members.remember(message.author)
+
+@bot.listen("on_member_join")
+async def remember_joiner(member):
+    recent_members.remember(member)
+
+@bot.listen("on_raw_member_remove")
+async def forget_leaver(payload):
+    recent_members.put(payload.guild_id, payload.user.id, MISSING_MEMBER)
+
+# ---------- COMMAND TIMING ----------
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+
+@bot.after_invoke
+async def stop_command_timer(ctx):
+    started = getattr(ctx, "started_at", None)
+    if started is not None:
+        metrics.command(ctx.command.qualified_name).observe(time.perf_counter() - started)
+
 # ---------- ERROR HANDLER ----------
 @bot.event
 async def on_command_error(ctx, error):
+    metrics.record_error(getattr(error, "original", error))
     if isinstance(error, commands.CommandNotFound):
         return
 
@@ -781,10 +3290,16 @@ async def on_command_error(ctx, error):
         commands.BadArgument: {
             "Member": "I know not of that soul in our realm. Use @mention or exact name, m'lord.",
             "TextChannel": "I know not of that hall. Use #channel or exact name.",
+            "Duration": "I cannot reckon that sentence. Speak it as `30m`, `12h`, `7d` or `2w`.",
+            "Period": "I cannot reckon that span of time. Speak it as `since 7d` or `between 2025-01-01 2025-02-01`.",
             "default": "Thy argument is flawed, noble sir. Check thy command usage."
         },
         commands.MissingPermissions: "🚫  Thou lacketh the royal seal for this command! Only the Crown's appointed may wield such power.",
         commands.NoPrivateMessage: "⚠️  Royal commands may not be issued in private chambers! The court must witness justice.",
+        commands.MaxConcurrencyReached: "⏳  The court is already about this labour! Await the end of the current judgment, m'lord.",
+        commands.BadFlagArgument: "Thy filters are garbled! Use `user: @knave`, `match: words`, `attachments: yes`, `bots: yes` or `since: 2h`.",
+        commands.MissingFlagArgument: "Thy filter lacketh a value! Write it as `since: 2h` or `user: @knave`.",
+        commands.TooManyFlags: "Name each filter but once, m'lord!",
         commands.MissingRequiredArgument: {
             "member": "Thou must name a subject for judgment, m'lord!",
             "minutes": "Thou must specify the duration of sentence!",
@@ -821,15 +3336,16 @@ async def on_command_error(ctx, error):
 
     if error_msg:
         embed = medieval_response(error_msg, success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
     else:
         embed = medieval_response("An ill omen befell the royal scribes! The chronicles shall record this mishap.", success=False)
-        await ctx.send(embed=embed)
+        herald.post(ctx, embed=embed)
         logger.error(f"🏰  Unhandled error: {type(error).__name__} - {error}")
 
 # ---------- HYBRID RUNNER ----------
 class HybridRunner:
     def __init__(self):
+        metrics.prepare_commands(cmd.qualified_name for cmd in bot.commands)
         self.web_app = create_web_app()
         self.web_runner = None
         self.bot_task = None
@@ -839,34 +3355,231 @@ class HybridRunner:
         self.web_runner = web.AppRunner(self.web_app)
         await self.web_runner.setup()
         port = int(os.getenv('PORT', '10000'))
-        site = web.TCPSite(self.web_runner, '0.0.0.0', port)
+        site = web.TCPSite(self.web_runner, WEB_HOST, port)
         await site.start()
         logger.info(f"🌐 Web server started on port {port}")
         
     async def start_bot(self):
         """Start the Discord bot"""
         try:
-            await bot.start(TOKEN)
+            await bot.login(TOKEN)
+            # The scheduler waits on the client's ready event, which only exists once logged in
+            sentences.start()
+            await bot.connect()
         except Exception as e:
             logger.error(f"❌ Bot failed to start: {e}")
             raise
             
     async def run(self):
         """Run both web server and bot"""
+        # Open the royal archives before anything can log to them
+        try:
+            await db.open()
+            if VACUUM_ON_START and CLUSTER_ID is None:
+                await db.rebuild_for_reclaim()
+            await guild_config.load()
+        except sqlite3.Error as e:
+            logger.error(f"❌ Database initialization failed: {e}")
+            raise
+        journal.start()
+        watchdog.start()
+        herald.start()
+        if RETENTION_DAYS > 0 and not CLUSTER_ID:
+            archive.start()
+
         # Start web server first
         await self.start_web_server()
         
         # Start bot in background
         self.bot_task = asyncio.create_task(self.start_bot())
-        
+
+        # Render and the cluster supervisor stop us with SIGTERM; end the bot task so the drain below runs
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.bot_task.cancel)
+
         # Keep both running
         try:
             await self.bot_task
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             logger.info("🛑 Shutting down...")
         finally:
+            if not bot.is_closed():
+                await bot.close()
             if self.web_runner:
                 await self.web_runner.cleanup()
+            await archive.stop()
+            await sentences.stop()
+            await herald.stop()
+            await watchdog.stop()
+            await journal.stop()
+            await db.close()
+
+# ---------- CLUSTER SUPERVISOR ----------
+async def recommended_shard_count():
+    """Ask Discord how many shards this bot should run"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{discord.http.Route.BASE}/gateway/bot",
+                               headers={"Authorization": f"Bot {TOKEN}"}) as resp:
+            if resp.status == 401:
+                raise discord.LoginFailure("Improper token has been passed.")
+            resp.raise_for_status()
+            return (await resp.json())["shards"]
+
+class ClusterSupervisor:
+    """Runs shard clusters as worker processes sharing one database.
+
+    Shards are dealt round-robin to CLUSTER_COUNT workers. Each worker is this
+    same script started with CLUSTER_ID, SHARD_IDS and a private loopback PORT.
+    The supervisor owns the public port and aggregates the workers' health,
+    /status and /metrics; /export reads the shared database directly.
+    """
+
+    def __init__(self, cluster_count):
+        self.cluster_count = cluster_count
+        self.port = int(os.getenv('PORT', '10000'))
+        self.shard_count = None
+        self.workers = {}
+        self.web_runner = None
+        self.session = None
+        self.stopping = False
+
+    def worker_port(self, cluster_id):
+        return self.port + 1 + cluster_id
+
+    def shard_ids(self, cluster_id):
+        return [s for s in range(self.shard_count) if s % self.cluster_count == cluster_id]
+
+    async def spawn(self, cluster_id):
+        env = dict(
+            os.environ,
+            CLUSTER_ID=str(cluster_id),
+            SHARD_COUNT=str(self.shard_count),
+            SHARD_IDS=",".join(map(str, self.shard_ids(cluster_id))),
+            PORT=str(self.worker_port(cluster_id)),
+            WEB_HOST="127.0.0.1",
+        )
+        self.workers[cluster_id] = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), env=env)
+        logger.info(f"⚔️ Cluster {cluster_id} raised with shards {env['SHARD_IDS']} (pid {self.workers[cluster_id].pid})")
+
+    async def keep_alive(self, cluster_id):
+        """Respawn a worker whenever it dies until the supervisor stops"""
+        while not self.stopping:
+            code = await self.workers[cluster_id].wait()
+            if self.stopping:
+                return
+            logger.error(f"❌ Cluster {cluster_id} fell with exit code {code}; raising it again in 5s")
+            await asyncio.sleep(5)
+            await self.spawn(cluster_id)
+
+    async def _fetch(self, cluster_id, path):
+        try:
+            async with self.session.get(f"http://127.0.0.1:{self.worker_port(cluster_id)}{path}") as resp:
+                return resp.status, await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None, None
+
+    async def health_check(self, request):
+        down = [cid for cid, proc in self.workers.items() if proc.returncode is not None]
+        if down:
+            return web.Response(text=f"🏚️ Clusters {down} have fallen!", status=503)
+        return web.Response(text=f"🏰 Royal Court Bot is alive across {self.cluster_count} clusters!")
+
+    async def status_endpoint(self, request):
+        replies = await asyncio.gather(*(self._fetch(cid, "/status") for cid in range(self.cluster_count)))
+        clusters = []
+        for cluster_id, (code, text) in enumerate(replies):
+            entry = {"cluster": cluster_id, "shard_ids": self.shard_ids(cluster_id), "status": "unreachable"}
+            if text:
+                try:
+                    entry.update(json.loads(text))
+                except ValueError:
+                    pass
+            clusters.append(entry)
+        online = [c for c in clusters if c["status"] == "online"]
+        status = "online" if len(online) == len(clusters) else "degraded" if online else "starting"
+        return web.json_response({
+            "status": status,
+            "guilds": sum(c["guilds"] for c in online),
+            "users": sum(c["users"] for c in online),
+            "shard_count": self.shard_count,
+            "clusters": clusters,
+        }, status=503 if not online else 200)
+
+    async def metrics_endpoint(self, request):
+        """Merge every worker's metrics, adding a cluster label and keeping metric families grouped"""
+        replies = await asyncio.gather(*(self._fetch(cid, "/metrics") for cid in range(self.cluster_count)))
+        families = {}
+        for cluster_id, (code, text) in enumerate(replies):
+            if code != 200:
+                continue
+            family, help_line = None, None
+            for line in text.splitlines():
+                if line.startswith("# HELP"):
+                    help_line = line
+                elif line.startswith("# TYPE"):
+                    family = (help_line, line)
+                    families.setdefault(family, [])
+                elif line and family:
+                    series, value = line.rsplit(" ", 1)
+                    if series.endswith("}"):
+                        series = series.replace("{", f'{{cluster="{cluster_id}",', 1)
+                    else:
+                        series += f'{{cluster="{cluster_id}"}}'
+                    families[family].append(f"{series} {value}")
+        lines = []
+        for (help_line, type_line), samples in families.items():
+            lines += [help_line, type_line, *samples]
+        return web.Response(text="\n".join(lines) + "\n",
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def start_web_server(self):
+        app = web.Application()
+        app.router.add_get('/', self.health_check)
+        app.router.add_get('/ping', ping_endpoint)
+        app.router.add_get('/status', self.status_endpoint)
+        app.router.add_get('/metrics', self.metrics_endpoint)
+        app.router.add_get('/export', export_endpoint)
+        app.router.add_get('/stats', stats_endpoint)
+        self.web_runner = web.AppRunner(app)
+        await self.web_runner.setup()
+        await web.TCPSite(self.web_runner, WEB_HOST, self.port).start()
+        logger.info(f"🌐 Supervisor web server started on port {self.port}")
+
+    async def run(self):
+        """Migrate the database once, then raise every cluster and watch over them"""
+        await db.open()
+        if VACUUM_ON_START:
+            await db.rebuild_for_reclaim()
+        if SHARD_COUNT and SHARD_COUNT != "auto":
+            self.shard_count = int(SHARD_COUNT)
+        else:
+            self.shard_count = await recommended_shard_count()
+        self.shard_count = max(self.shard_count, self.cluster_count)
+        logger.info(f"🏰 Dividing {self.shard_count} shards among {self.cluster_count} clusters")
+
+        loop = asyncio.get_running_loop()
+        main_task = asyncio.current_task()
+        loop.add_signal_handler(signal.SIGTERM, main_task.cancel)
+
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2))
+        await self.start_web_server()
+        try:
+            for cluster_id in range(self.cluster_count):
+                await self.spawn(cluster_id)
+            await asyncio.gather(*(self.keep_alive(cid) for cid in range(self.cluster_count)))
+        except asyncio.CancelledError:
+            logger.info("🛑 Shutting down clusters...")
+        finally:
+            self.stopping = True
+            for proc in self.workers.values():
+                if proc.returncode is None:
+                    proc.terminate()
+            await asyncio.gather(*(proc.wait() for proc in self.workers.values()))
+            await self.web_runner.cleanup()
+            await self.session.close()
+            await db.close()
 
 # ---------- RUN ----------
 if __name__ == "__main__":
@@ -876,7 +3589,10 @@ if __name__ == "__main__":
     logger.info("🎭  All commands require the royal seal...")
     
     try:
-        runner = HybridRunner()
+        if CLUSTER_COUNT > 1 and CLUSTER_ID is None:
+            runner = ClusterSupervisor(CLUSTER_COUNT)
+        else:
+            runner = HybridRunner()
         asyncio.run(runner.run())
     except discord.LoginFailure:
         logger.error("❌ Failed to login! Check your DISCORD_TOKEN environment variable.")
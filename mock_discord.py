@@ -0,0 +1,621 @@
+"""Local stand-in for the Discord REST API and gateway, for end-to-end load runs.
+
+Speaks just enough of API v10 for bot.py to log in, receive one guild with
+its members and channels, and have its sends, edits, deletes, bulk deletes,
+bans, kicks and timeouts answered. Every REST call waits a simulated latency
+and passes through per-route and global rate-limit buckets that answer with
+real X-RateLimit-* headers and 429s.
+
+A trace is JSON lines of timed gateway events:
+
+    {"at": 0.25, "event": "message", "author": "moderator", "content": "!stocks {target} 5 spam"}
+    {"at": 0.30, "event": "message", "author": "member", "content": "good morrow"}
+    {"at": 0.40, "event": "join"}
+    {"at": 0.90, "event": "leave"}
+
+`{target}` becomes a mention of a random current member. The trace is
+replayed once per --speeds multiple. Command messages (those starting with
+the prefix) are paired with the bot's next reply in their channel, which
+gives a reply latency per stage and shows where one process saturates.
+
+    python mock_discord.py --generate 5000 --rate 50 > trace.jsonl
+    python mock_discord.py --trace trace.jsonl --speeds 1,2,4,8 --spawn
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import itertools
+from collections import deque
+from datetime import datetime, timezone
+
+from aiohttp import web, WSMsgType
+
+DISCORD_EPOCH_MS = 1420070400000
+API_PREFIX = "/api/v10"
+ADMINISTRATOR = str(1 << 3)
+# Discord's edge adds this to every API response; discord.py treats a 429 without it as a Cloudflare ban
+VIA_HEADER = {"Via": "1.1 google"}
+EVERYONE_PERMISSIONS = "104324673"
+
+# ---------- IDS AND PAYLOADS ----------
+_sequence = itertools.count()
+
+def snowflake(at=None):
+    """Snowflake for `at` (epoch seconds, default now), unique within this process"""
+    ms = int((at if at is not None else time.time()) * 1000)
+    return ((ms - DISCORD_EPOCH_MS) << 22) | (next(_sequence) & 0x3FFFFF)
+
+def snowflake_time(value):
+    return ((int(value) >> 22) + DISCORD_EPOCH_MS) / 1000
+
+def iso(at=None):
+    return datetime.fromtimestamp(at if at is not None else time.time(), timezone.utc).isoformat()
+
+class MockMember:
+    __slots__ = ("id", "name", "bot", "roles", "joined_at", "timed_out_until")
+
+    def __init__(self, name, roles=(), bot=False, member_id=None):
+        self.id = member_id or snowflake()
+        self.name = name
+        self.bot = bot
+        self.roles = list(roles)
+        self.joined_at = iso()
+        self.timed_out_until = None
+
+    def user(self):
+        return {"id": str(self.id), "username": self.name, "global_name": self.name,
+                "discriminator": "0", "avatar": None, "bot": self.bot}
+
+    def partial(self):
+        return {"roles": self.roles, "joined_at": self.joined_at, "deaf": False, "mute": False, "flags": 0,
+                "communication_disabled_until": self.timed_out_until}
+
+    def payload(self):
+        return {"user": self.user(), **self.partial()}
+
+def json_response(data, status=200, headers=None):
+    # discord.py only parses bodies whose content-type is exactly application/json, without a charset
+    return web.Response(body=json.dumps(data).encode(), status=status, headers=headers, content_type="application/json")
+
+# ---------- RATE LIMITS ----------
+class Bucket:
+    __slots__ = ("name", "limit", "per", "remaining", "reset_at")
+
+    def __init__(self, name, limit, per):
+        self.name = name
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now):
+        """Spend one request; returns seconds to wait if the bucket is empty, else 0"""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        if self.remaining <= 0:
+            return self.reset_at - now
+        self.remaining -= 1
+        return 0.0
+
+    def headers(self, now):
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(self.remaining, 0)),
+            "X-RateLimit-Reset": f"{time.time() + self.reset_at - now:.3f}",
+            "X-RateLimit-Reset-After": f"{max(self.reset_at - now, 0):.3f}",
+            "X-RateLimit-Bucket": self.name,
+        }
+
+def route_key(method, path):
+    """Discord buckets per route template and major parameter (the first id in the path)"""
+    parts = path.split("/")
+    ids = [i for i, part in enumerate(parts) if part.isdigit()]
+    for i in ids[1:]:
+        parts[i] = "{id}"
+    return f"{method} {'/'.join(parts)}"
+
+# ---------- STAGE STATS ----------
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+class StageStats:
+    def __init__(self, speed):
+        self.speed = speed
+        self.events = 0
+        self.commands = 0
+        self.replies = []
+        self.rest_calls = 0
+        self.limited = 0
+        self.started = time.monotonic()
+        self.finished = None
+
+    def summary(self, backlog):
+        replies = sorted(self.replies)
+        wall = (self.finished or time.monotonic()) - self.started
+        return {
+            "speed": self.speed,
+            "events": self.events,
+            "events_per_s": round(self.events / wall, 1) if wall else 0.0,
+            "commands": self.commands,
+            "replied": len(replies),
+            "unanswered": backlog,
+            "reply_p50_ms": round(percentile(replies, 0.50) * 1000, 1),
+            "reply_p99_ms": round(percentile(replies, 0.99) * 1000, 1),
+            "rest_calls": self.rest_calls,
+            "rate_limited": self.limited,
+        }
+
+# ---------- MOCK DISCORD ----------
+class MockDiscord:
+    """One guild's worth of Discord, served over HTTP and a websocket"""
+
+    def __init__(self, members=200, history=1000, latency=0.05, jitter=0.01,
+                 route_limit=(5, 5.0), global_limit=50, prefix="!"):
+        self.latency = latency
+        self.jitter = jitter
+        self.route_limit = route_limit
+        self.global_bucket = Bucket("global", global_limit, 1.0)
+        self.buckets = {}
+        self.prefix = prefix
+        self.history_size = history
+
+        self.guild_id = snowflake()
+        self.bot_role = snowflake()
+        self.mod_role = snowflake()
+        self.bot_user = MockMember("Royal Herald", [str(self.bot_role)], bot=True)
+        self.owner = MockMember("The Sovereign")
+        self.moderator = MockMember("Lord Chancellor", [str(self.mod_role)])
+        self.members = {m.id: m for m in (self.bot_user, self.owner, self.moderator)}
+        for index in range(members):
+            self.add_member(MockMember(f"Peasant {index}"))
+        self.channels = {snowflake(): name for name in ("great-hall", "tavern", "proclamations")}
+        self.hall = next(iter(self.channels))
+        self._history = {}
+        self.bans = set()
+
+        self.ws = None
+        self._seq = 0
+        self._send_lock = asyncio.Lock()
+        self.ready = asyncio.Event()
+        self.pending = {channel_id: deque() for channel_id in self.channels}
+        self.stage = StageStats(0)
+        self.unhandled = {}
+
+    def add_member(self, member):
+        self.members[member.id] = member
+        return member
+
+    # ----- gateway -----
+    async def dispatch(self, event, data):
+        if self.ws is None or self.ws.closed:
+            return
+        async with self._send_lock:
+            self._seq += 1
+            await self.ws.send_str(json.dumps({"op": 0, "t": event, "s": self._seq, "d": data}))
+
+    async def gateway(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self.ws = ws
+        await ws.send_str(json.dumps({"op": 10, "d": {"heartbeat_interval": 41250}}))
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            payload = json.loads(msg.data)
+            op, data = payload.get("op"), payload.get("d")
+            if op == 1:
+                await ws.send_str(json.dumps({"op": 11}))
+            elif op in (2, 6):
+                await self.identify(request, data)
+            elif op == 8:
+                await self.chunk_members(data)
+        self.ws = None
+        return ws
+
+    async def identify(self, request, data):
+        shard = (data or {}).get("shard") or [0, 1]
+        url = f"ws://{request.host}/gateway"
+        await self.dispatch("READY", {
+            "v": 10, "user": self.bot_user.user(), "session_id": "mock-session", "resume_gateway_url": url,
+            "guilds": [{"id": str(self.guild_id), "unavailable": True}], "shard": shard,
+            "application": {"id": str(self.bot_user.id), "flags": 0},
+        })
+        await self.dispatch("GUILD_CREATE", self.guild_payload())
+        self.ready.set()
+
+    async def chunk_members(self, data):
+        wanted = data.get("user_ids")
+        members = ([self.members[int(i)] for i in wanted if int(i) in self.members] if wanted
+                   else list(self.members.values()))
+        await self.dispatch("GUILD_MEMBERS_CHUNK", {
+            "guild_id": str(self.guild_id), "members": [m.payload() for m in members],
+            "chunk_index": 0, "chunk_count": 1, "nonce": data.get("nonce"), "not_found": [],
+        })
+
+    def guild_payload(self):
+        roles = [
+            {"id": str(self.guild_id), "name": "@everyone", "permissions": EVERYONE_PERMISSIONS, "position": 0},
+            {"id": str(self.mod_role), "name": "Court", "permissions": ADMINISTRATOR, "position": 1},
+            {"id": str(self.bot_role), "name": "Herald", "permissions": ADMINISTRATOR, "position": 2},
+        ]
+        for role in roles:
+            role.update(color=0, hoist=False, managed=False, mentionable=False, flags=0)
+        return {
+            "id": str(self.guild_id), "name": "Mock Realm", "icon": None, "owner_id": str(self.owner.id),
+            "roles": roles, "emojis": [], "stickers": [], "features": [], "verification_level": 0,
+            "default_message_notifications": 0, "explicit_content_filter": 0, "mfa_level": 0,
+            "system_channel_id": str(self.hall), "afk_timeout": 300, "premium_tier": 0, "nsfw_level": 0,
+            "preferred_locale": "en-US", "large": False, "joined_at": iso(), "member_count": len(self.members),
+            "members": [m.payload() for m in self.members.values()], "voice_states": [], "presences": [],
+            "threads": [], "stage_instances": [], "guild_scheduled_events": [],
+            "channels": [{"id": str(cid), "type": 0, "name": name, "position": i, "permission_overwrites": [],
+                          "guild_id": str(self.guild_id)} for i, (cid, name) in enumerate(self.channels.items())],
+        }
+
+    def message_payload(self, channel_id, author, content="", message_id=None, mentions=(), **extra):
+        message_id = message_id or snowflake()
+        return {
+            "id": str(message_id), "channel_id": str(channel_id), "guild_id": str(self.guild_id),
+            "author": author.user(), "member": author.partial(), "content": content,
+            "timestamp": iso(snowflake_time(message_id)), "edited_timestamp": None, "tts": False,
+            "mention_everyone": False, "mention_roles": [], "attachments": [], "embeds": extra.get("embeds", []),
+            "components": extra.get("components", []), "pinned": False, "type": 0,
+            "mentions": [{**m.user(), "member": m.partial()} for m in mentions],
+        }
+
+    # ----- trace events -----
+    def random_member(self):
+        candidates = [m for m in self.members.values() if not m.bot and m.id not in (self.owner.id, self.moderator.id)]
+        return random.choice(candidates) if candidates else self.moderator
+
+    async def play(self, event):
+        kind = event.get("event", "message")
+        self.stage.events += 1
+        if kind == "message":
+            mentions = []
+            content = event.get("content", "")
+            if "{target}" in content:
+                target = self.random_member()
+                mentions.append(target)
+                content = content.replace("{target}", f"<@{target.id}>")
+            author = self.moderator if event.get("author") == "moderator" else self.random_member()
+            channel_id = list(self.channels)[event.get("channel", 0) % len(self.channels)]
+            if content.startswith(self.prefix):
+                self.stage.commands += 1
+                self.pending[channel_id].append(time.monotonic())
+            await self.dispatch("MESSAGE_CREATE", self.message_payload(channel_id, author, content, mentions=mentions))
+        elif kind == "join":
+            member = self.add_member(MockMember(f"Traveller {len(self.members)}"))
+            await self.dispatch("GUILD_MEMBER_ADD", {"guild_id": str(self.guild_id), **member.payload()})
+        elif kind == "leave":
+            member = self.random_member()
+            await self.remove_member(member.id)
+
+    async def remove_member(self, user_id):
+        member = self.members.pop(user_id, None)
+        if member is not None:
+            await self.dispatch("GUILD_MEMBER_REMOVE", {"guild_id": str(self.guild_id), "user": member.user()})
+
+    async def replay(self, events, speed, drain=10.0):
+        """Play the trace at `speed` times real time, then wait for the bot to answer what it can"""
+        self.stage = StageStats(speed)
+        for queue in self.pending.values():
+            queue.clear()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for event in events:
+            delay = start + event.get("at", 0) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.play(event)
+        self.stage.finished = time.monotonic()
+        deadline = time.monotonic() + drain
+        while any(self.pending.values()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return self.stage.summary(sum(len(q) for q in self.pending.values()))
+
+    # ----- REST -----
+    @web.middleware
+    async def rest_middleware(self, request, handler):
+        if not request.path.startswith(API_PREFIX):
+            return await handler(request)
+        self.stage.rest_calls += 1
+        now = time.monotonic()
+        key = route_key(request.method, request.path[len(API_PREFIX):])
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = Bucket(f"{abs(hash(key)):x}", *self.route_limit)
+        wait_global = self.global_bucket.take(now)
+        wait_route = 0.0 if wait_global else bucket.take(now)
+        if wait_global or wait_route:
+            self.stage.limited += 1
+            retry_after = wait_global or wait_route
+            headers = {"Retry-After": f"{retry_after:.3f}", "X-RateLimit-Scope": "global" if wait_global else "user", **VIA_HEADER}
+            if wait_global:
+                headers["X-RateLimit-Global"] = "true"
+            else:
+                headers.update(bucket.headers(now))
+            return json_response({"message": "You are being rate limited.", "retry_after": retry_after,
+                                      "global": bool(wait_global)}, status=429, headers=headers)
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        response = await handler(request)
+        response.headers.update(bucket.headers(time.monotonic()))
+        response.headers.update(VIA_HEADER)
+        return response
+
+    def routes(self):
+        r = API_PREFIX
+        return [
+            web.get("/gateway", self.gateway),
+            web.get(f"{r}/gateway", self.get_gateway),
+            web.get(f"{r}/gateway/bot", self.get_gateway),
+            web.get(f"{r}/users/@me", self.get_me),
+            web.get(f"{r}/oauth2/applications/@me", self.get_application),
+            web.post(f"{r}/channels/{{channel_id}}/messages", self.send_message),
+            web.get(f"{r}/channels/{{channel_id}}/messages", self.history),
+            web.patch(f"{r}/channels/{{channel_id}}/messages/{{message_id}}", self.edit_message),
+            web.delete(f"{r}/channels/{{channel_id}}/messages/{{message_id}}", self.delete_message),
+            web.post(f"{r}/channels/{{channel_id}}/messages/bulk-delete", self.bulk_delete),
+            web.put(f"{r}/guilds/{{guild_id}}/bans/{{user_id}}", self.ban),
+            web.delete(f"{r}/guilds/{{guild_id}}/bans/{{user_id}}", self.unban),
+            web.delete(f"{r}/guilds/{{guild_id}}/members/{{user_id}}", self.kick),
+            web.get(f"{r}/guilds/{{guild_id}}/members/{{user_id}}", self.get_member),
+            web.patch(f"{r}/guilds/{{guild_id}}/members/{{user_id}}", self.edit_member),
+            web.patch(f"{r}/guilds/{{guild_id}}", self.edit_guild),
+            web.route("*", "/{tail:.*}", self.unknown),
+        ]
+
+    async def get_gateway(self, request):
+        return json_response({"url": f"ws://{request.host}/gateway", "shards": 1,
+                                  "session_start_limit": {"total": 1000, "remaining": 1000,
+                                                          "reset_after": 0, "max_concurrency": 1}})
+
+    async def get_me(self, request):
+        return json_response(self.bot_user.user())
+
+    async def edit_guild(self, request):
+        return json_response(self.guild_payload())
+
+    async def get_application(self, request):
+        return json_response({"id": str(self.bot_user.id), "name": "Royal Herald", "icon": None,
+                                  "description": "", "bot_public": True, "bot_require_code_grant": False,
+                                  "verify_key": "0" * 64, "flags": 0, "owner": self.owner.user()})
+
+    async def unknown(self, request):
+        key = route_key(request.method, request.path)
+        self.unhandled[key] = self.unhandled.get(key, 0) + 1
+        return json_response({"message": "404: Not Found", "code": 0}, status=404)
+
+    async def send_message(self, request):
+        channel_id = int(request.match_info["channel_id"])
+        body = await request.json() if request.content_type == "application/json" else {}
+        queue = self.pending.get(channel_id)
+        if queue:
+            self.stage.replies.append(time.monotonic() - queue.popleft())
+        return json_response(self.message_payload(channel_id, self.bot_user, body.get("content") or "",
+                                                      embeds=body.get("embeds", []), components=body.get("components", [])))
+
+    async def edit_message(self, request):
+        body = await request.json()
+        return json_response(self.message_payload(
+            int(request.match_info["channel_id"]), self.bot_user, body.get("content") or "",
+            message_id=int(request.match_info["message_id"]), embeds=body.get("embeds", [])))
+
+    def channel_history(self, channel_id):
+        """Synthetic backlog, one message a minute going back from startup, oldest last"""
+        history = self._history.get(channel_id)
+        if history is None:
+            start = time.time()
+            history = self._history[channel_id] = [snowflake(start - 60 * i) for i in range(self.history_size)]
+        return history
+
+    async def history(self, request):
+        channel_id = int(request.match_info["channel_id"])
+        limit = min(int(request.query.get("limit", 50)), 100)
+        before = int(request.query.get("before", 0)) or None
+        after = int(request.query.get("after", 0)) or None
+        ids = [i for i in self.channel_history(channel_id)
+               if (before is None or i < before) and (after is None or i > after)][:limit]
+        authors = list(self.members.values())
+        return json_response([self.message_payload(channel_id, authors[i % len(authors)], "hear ye", message_id=i)
+                                  for i in ids])
+
+    async def delete_message(self, request):
+        history = self.channel_history(int(request.match_info["channel_id"]))
+        message_id = int(request.match_info["message_id"])
+        if message_id in history:
+            history.remove(message_id)
+        return web.Response(status=204)
+
+    async def bulk_delete(self, request):
+        channel_id = int(request.match_info["channel_id"])
+        doomed = {int(i) for i in (await request.json()).get("messages", [])}
+        self._history[channel_id] = [i for i in self.channel_history(channel_id) if i not in doomed]
+        return web.Response(status=204)
+
+    async def ban(self, request):
+        user_id = int(request.match_info["user_id"])
+        self.bans.add(user_id)
+        member = self.members.get(user_id)
+        user = member.user() if member else {"id": str(user_id), "username": "Stranger", "discriminator": "0", "avatar": None}
+        await self.dispatch("GUILD_BAN_ADD", {"guild_id": str(self.guild_id), "user": user})
+        await self.remove_member(user_id)
+        return web.Response(status=204)
+
+    async def unban(self, request):
+        user_id = int(request.match_info["user_id"])
+        if user_id not in self.bans:
+            return json_response({"message": "Unknown Ban", "code": 10026}, status=404)
+        self.bans.discard(user_id)
+        return web.Response(status=204)
+
+    async def kick(self, request):
+        user_id = int(request.match_info["user_id"])
+        if user_id not in self.members:
+            return json_response({"message": "Unknown Member", "code": 10007}, status=404)
+        await self.remove_member(user_id)
+        return web.Response(status=204)
+
+    async def get_member(self, request):
+        member = self.members.get(int(request.match_info["user_id"]))
+        if member is None:
+            return json_response({"message": "Unknown Member", "code": 10007}, status=404)
+        return json_response(member.payload())
+
+    async def edit_member(self, request):
+        member = self.members.get(int(request.match_info["user_id"]))
+        if member is None:
+            return json_response({"message": "Unknown Member", "code": 10007}, status=404)
+        body = await request.json()
+        if "communication_disabled_until" in body:
+            member.timed_out_until = body["communication_disabled_until"]
+        return json_response(member.payload())
+
+    def app(self):
+        app = web.Application(middlewares=[self.rest_middleware])
+        app.add_routes(self.routes())
+        return app
+
+# ---------- TRACES ----------
+def generate_trace(count, rate, command_share=0.1, churn_share=0.02, prefix="!", seed=1):
+    """A synthetic trace: mostly chatter, some moderation commands, a trickle of joins and leaves"""
+    rnd = random.Random(seed)
+    commands = [
+        "stocks {target} 5 spamming the tavern", "pillory {target} 10 insolence", "castout {target} unruly",
+        "banish {target} treason", "chronicle {target}", "courtlog 10", "purge 20", "search spam",
+        "decree tavern The feast begins at sundown!",
+    ]
+    chatter = ["good morrow", "huzzah", "who goes there", "pass the mead", "the king is wise", "long live the crown"]
+    at = 0.0
+    for _ in range(count):
+        at += rnd.expovariate(rate)
+        roll = rnd.random()
+        if roll < churn_share:
+            event = {"at": round(at, 4), "event": rnd.choice(("join", "leave"))}
+        elif roll < churn_share + command_share:
+            event = {"at": round(at, 4), "event": "message", "author": "moderator", "channel": rnd.randrange(3),
+                     "content": prefix + rnd.choice(commands)}
+        else:
+            event = {"at": round(at, 4), "event": "message", "author": "member", "channel": rnd.randrange(3),
+                     "content": rnd.choice(chatter)}
+        yield event
+
+def load_trace(path):
+    with open(path) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    events.sort(key=lambda event: event.get("at", 0))
+    return events
+
+# ---------- RUNNER ----------
+def spawn_bot(host, port, web_port, workdir):
+    env = dict(os.environ,
+               DISCORD_TOKEN="mock.token", DISCORD_API_BASE=f"http://{host}:{port}{API_PREFIX}",
+               DISCORD_GATEWAY=f"ws://{host}:{port}/gateway", DB_NAME=os.path.join(workdir, "mock_court.db"),
+               PORT=str(web_port), WEB_HOST="127.0.0.1")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+    return asyncio.create_subprocess_exec(sys.executable, script, env=env)
+
+def print_stage(s):
+    print(f"  x{s['speed']:<6g} {s['events']:>7,} events {s['events_per_s']:>9,.1f}/s  "
+          f"{s['replied']:>6,}/{s['commands']:<6,} replied  p50 {s['reply_p50_ms']:>8} ms  p99 {s['reply_p99_ms']:>8} ms  "
+          f"{s['rest_calls']:>7,} REST  {s['rate_limited']:>5,} 429s")
+
+async def run(args):
+    mock = MockDiscord(members=args.members, history=args.history, latency=args.latency, jitter=args.jitter,
+                       route_limit=(args.route_limit, args.route_window), global_limit=args.global_limit,
+                       prefix=args.prefix)
+    runner = web.AppRunner(mock.app())
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"🏰 Mock Discord on http://{args.host}:{args.port}{API_PREFIX} and ws://{args.host}:{args.port}/gateway")
+
+    bot_process = None
+    if args.spawn:
+        workdir = args.workdir or tempfile.mkdtemp(prefix="royal_mock_")
+        os.makedirs(workdir, exist_ok=True)
+        bot_process = await spawn_bot(args.host, args.port, args.web_port, workdir)
+    try:
+        if not args.trace:
+            print("No --trace given; serving until interrupted.")
+            await asyncio.Event().wait()
+        events = load_trace(args.trace)
+        waiters = [asyncio.create_task(mock.ready.wait())]
+        if bot_process is not None:
+            waiters.append(asyncio.create_task(bot_process.wait()))
+        done, pending = await asyncio.wait(waiters, timeout=args.connect_timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if not mock.ready.is_set():
+            print("❌ The bot never identified with the mock gateway")
+            return
+        await asyncio.sleep(args.settle)
+        print(f"⚖️  Replaying {len(events):,} events ({events[-1]['at'] if events else 0:.1f}s of traffic)")
+        results = []
+        saturated = None
+        for speed in (float(s) for s in args.speeds.split(",")):
+            summary = await mock.replay(events, speed, drain=args.drain)
+            results.append(summary)
+            print_stage(summary)
+            if saturated is None and (summary["unanswered"] or summary["reply_p99_ms"] > args.slo_ms):
+                saturated = speed
+        if saturated is None:
+            print("✅ No saturation within the tested speeds")
+        else:
+            print(f"⚠️ Saturated at x{saturated:g} (unanswered commands or p99 above {args.slo_ms:g} ms)")
+        if mock.unhandled:
+            print(f"⚠️ Unhandled routes: {mock.unhandled}")
+        if args.json_path:
+            with open(args.json_path, "w") as f:
+                json.dump({"stages": results, "saturated_at": saturated, "unhandled": mock.unhandled}, f, indent=2)
+    finally:
+        if bot_process is not None and bot_process.returncode is None:
+            bot_process.terminate()
+            await bot_process.wait()
+        await runner.cleanup()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local Discord stand-in for load-testing bot.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--trace", help="JSON-lines trace to replay")
+    parser.add_argument("--speeds", default="1", help="comma-separated replay multiples of real time")
+    parser.add_argument("--generate", type=int, metavar="N", help="print a synthetic trace of N events and exit")
+    parser.add_argument("--rate", type=float, default=20.0, help="events per second in a generated trace")
+    parser.add_argument("--members", type=int, default=200, help="members in the mock guild")
+    parser.add_argument("--history", type=int, default=1000, help="synthetic messages per channel for purges")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean REST latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="standard deviation of REST latency")
+    parser.add_argument("--route-limit", type=int, default=5, help="requests per bucket window for each route")
+    parser.add_argument("--route-window", type=float, default=5.0, help="seconds in a route bucket window")
+    parser.add_argument("--global-limit", type=int, default=50, help="requests per second across all routes")
+    parser.add_argument("--prefix", default=os.getenv("PREFIX", "!"))
+    parser.add_argument("--spawn", action="store_true", help="start bot.py against the mock")
+    parser.add_argument("--web-port", type=int, default=10001, help="PORT for the spawned bot's web server")
+    parser.add_argument("--workdir", help="directory for the spawned bot's database")
+    parser.add_argument("--connect-timeout", type=float, default=60.0)
+    parser.add_argument("--settle", type=float, default=3.0, help="seconds to wait after GUILD_CREATE")
+    parser.add_argument("--drain", type=float, default=10.0, help="seconds to wait for replies after each stage")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p99 reply latency that counts as saturated")
+    parser.add_argument("--json", dest="json_path", help="also write stage results to this file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.generate:
+        for event in generate_trace(args.generate, args.rate, prefix=args.prefix):
+            print(json.dumps(event))
+        return
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()